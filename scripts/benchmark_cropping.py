@@ -0,0 +1,67 @@
+"""
+benchmark_cropping.py
+
+Measures the peak memory (RSS) of cropping the 12 leads out of a synthetic 600 dpi letter page, comparing the old
+behavior (copying the whole page for every crop) with cropping views and contiguous copies of only the lead regions.
+Each mode runs in its own process, since the peak RSS of a process can't be reset.
+
+Usage: python scripts/benchmark_cropping.py [DPI]
+"""
+import resource
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / 'src' / 'main' / 'python'))
+
+from ecgdigitize.image import ColorImage, Rectangle, cropped
+
+
+MODES = ['page-copy', 'view', 'contiguous']
+
+
+def leadRegions(width: int, height: int) -> List[Rectangle]:
+    """A 3x4 grid of leads over the middle half of the page."""
+    leadWidth, leadHeight = width // 4, height // 8
+    top = height // 4
+
+    return [
+        Rectangle(column * leadWidth, top + row * leadHeight, leadWidth, leadHeight)
+        for row in range(3) for column in range(4)
+    ]
+
+
+def peakRSSInMegabytes() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Reported in KB on Linux
+
+
+def run(mode: str, dpi: int) -> None:
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    page = ColorImage(np.full((height, width, 3), 255, dtype=np.uint8))
+    baseline = peakRSSInMegabytes()
+
+    if mode == 'page-copy':
+        # What `cropped` used to do: copy the whole page, then slice it (the slice keeps the copy alive)
+        leads = [ColorImage(page.data.copy()[r.y:r.y + r.height, r.x:r.x + r.width]) for r in leadRegions(width, height)]
+    elif mode == 'view':
+        leads = [cropped(page, region) for region in leadRegions(width, height)]
+    elif mode == 'contiguous':
+        leads = [cropped(page, region, contiguous=True) for region in leadRegions(width, height)]
+    else:
+        raise ValueError(f"Unrecognized mode {mode}")
+
+    print(f"{mode:>12}{page.data.nbytes / 2**20:>12.1f}{peakRSSInMegabytes() - baseline:>16.1f}{len(leads):>8}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        run(sys.argv[1], int(sys.argv[2]))
+    else:
+        dpi = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+
+        print(f"{'mode':>12}{'page (MB)':>12}{'crops (MB)':>16}{'leads':>8}")
+        for mode in MODES:
+            subprocess.run([sys.executable, __file__, mode, str(dpi)], check=True)
@@ -0,0 +1,59 @@
+"""
+benchmark_extraction.py
+
+Times the signal extraction engines on synthetic "gappy" traces of increasing width, where most of the trace is
+missing. Time per column should stay flat as the width grows (i.e. scaling is linear in the image width).
+
+Usage: python scripts/benchmark_extraction.py [WIDTH ...]
+"""
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / 'src' / 'main' / 'python'))
+
+from ecgdigitize.image import BinaryImage
+from ecgdigitize.signal.extraction import vectorized, viterbi
+
+
+ENGINES = {
+    'viterbi': viterbi.extractSignal,
+    'vectorized': vectorized.extractSignal,
+}
+
+
+def gappyTrace(width: int, height: int = 200, visibleFraction: float = 0.1) -> BinaryImage:
+    """A sine wave that is only drawn in the first and last `visibleFraction` of the columns."""
+    data = np.zeros((height, width), dtype=np.uint8)
+    rows = (height / 2 + (height / 4) * np.sin(np.arange(width) / 25)).astype(int)
+    visible = int(width * visibleFraction)
+
+    for column in list(range(visible)) + list(range(width - visible, width)):
+        data[rows[column] - 1:rows[column] + 2, column] = 1
+
+    return BinaryImage(data)
+
+
+def timeEngine(engine, binary: BinaryImage, repeats: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # Silences the "None adjacent" debug output
+            engine(binary)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+if __name__ == '__main__':
+    widths = [int(argument) for argument in sys.argv[1:]] or [1000, 2000, 4000, 8000, 16000]
+
+    print(f"{'width':>8}" + ''.join(f"{name:>14}{'us/col':>10}" for name in ENGINES))
+    for width in widths:
+        binary = gappyTrace(width)
+        timings = [timeEngine(engine, binary) for engine in ENGINES.values()]
+        print(f"{width:>8}" + ''.join(f"{seconds:>13.4f}s{seconds / width * 1e6:>10.2f}" for seconds in timings))
@@ -0,0 +1,62 @@
+"""
+benchmark_pyramid.py
+
+Times the coarse-to-fine extraction (`pyramid`) against the full search (`vectorized`) on synthetic noisy leads: a thick
+trace split into thin runs (every other row cleared, as on heavily thresholded scans), in speckle noise. The corridor
+leaves the speckle out, so the fine level only searches a fraction of the runs the full search does.
+
+Usage: python scripts/benchmark_pyramid.py [WIDTH ...]
+"""
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / 'src' / 'main' / 'python'))
+
+from ecgdigitize.image import BinaryImage
+from ecgdigitize.signal.extraction import pyramid, vectorized
+
+
+def noisyTrace(width: int, height: int = 300, thickness: int = 9, noise: float = 0.02, seed: int = 0) -> BinaryImage:
+    random = np.random.default_rng(seed)
+    data = np.zeros((height, width), dtype=np.uint8)
+
+    rows = (height / 2 + 60 * np.sin(np.arange(width) / 30)).astype(int)
+    for column in range(width):
+        data[rows[column] - thickness // 2:rows[column] + thickness // 2 + 1, column] = 1
+
+    data[::2, :] = 0
+    data |= (random.random((height, width)) < noise).astype(np.uint8)
+
+    return BinaryImage(data)
+
+
+def timeEngine(engine, binary: BinaryImage, repeats: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        engine(binary)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+if __name__ == '__main__':
+    widths = [int(argument) for argument in sys.argv[1:]] or [1000, 2000, 4000, 8000]
+
+    print(f"{'width':>8}{'vectorized':>14}{'pyramid':>14}{'coarse':>10}{'fine':>10}{'speedup':>10}{'same':>6}")
+    for width in widths:
+        binary = noisyTrace(width)
+        full = timeEngine(vectorized.extractSignal, binary)
+        coarseToFine = timeEngine(pyramid.extractSignal, binary)
+
+        timings: Dict[str, float] = {}
+        same = np.array_equal(vectorized.extractSignal(binary), pyramid.extractSignal(binary, timings=timings))
+
+        print(
+            f"{width:>8}{full:>13.4f}s{coarseToFine:>13.4f}s{timings['coarse']:>9.4f}s{timings['fine']:>9.4f}s"
+            f"{full / coarseToFine:>9.2f}x{str(same):>6}"
+        )
@@ -1,4 +1,9 @@
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+import os
 from pathlib import Path
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
 
 import numpy as np
 from numpy.lib.arraysetops import isin
@@ -9,49 +14,71 @@ import ecgdigitize.image
 from ecgdigitize import common, visualization
 from ecgdigitize.image import ColorImage, Rectangle
 
+from ImageCache import imageCache
 from model.InputParameters import InputParameters
+from model.Lead import LeadId
 
 
-def convertECGLeads(inputImage: ColorImage, parameters: InputParameters):
-    # Apply rotation
-    rotatedImage = ecgdigitize.image.rotated(inputImage, parameters.rotation)
+# Page grid estimates, keyed by (decoded image cache key, rotation): the page's grid size, and the own estimate of each
+# lead region seen on it. Kept small; most sessions revisit a few pages. Pages are digitized from worker threads, so
+# it's only accessed under `_pageGridLock`.
+_pageGridCache: "OrderedDict[Tuple, Tuple[float, Dict[Rectangle, Optional[float]]]]" = OrderedDict()
+_pageGridLock = threading.Lock()
+PAGE_GRID_CACHE_SIZE = 32
 
-    # Crop each lead
-    leadImages = {
-        leadId: ecgdigitize.image.cropped(rotatedImage, Rectangle(lead.x, lead.y, lead.width, lead.height))
-        for leadId, lead in parameters.leads.items()
-    }
+# Per-lead estimates further than this fraction from the page's (or the consensus of the leads') are reported
+GRID_DISAGREEMENT_WARNING = 0.05
+
+# Pool size for digitizing the leads of one page in parallel (e.g. for interactive use)
+DEFAULT_LEAD_WORKERS = min(12, os.cpu_count() or 1)
+
+A = TypeVar("A")
+B = TypeVar("B")
+
+
+def convertECGLeads(inputImage: ColorImage, parameters: InputParameters, leadWorkers: int = 1):
+    """Digitizes every lead of the page.
+
+    With `leadWorkers > 1`, the per-lead stages (cropping, signal extraction, previews and per-lead grid estimates) run
+    in a thread pool of that size. Most of their time is spent in OpenCV and NumPy, which release the GIL, so a page
+    takes about as long as its slowest lead.
+    """
+    if leadWorkers > 1:
+        with ThreadPoolExecutor(max_workers=leadWorkers) as executor:
+            return _convertECGLeads(inputImage, parameters, executor)
+    else:
+        return _convertECGLeads(inputImage, parameters, None)
+
+
+def _convertECGLeads(inputImage: ColorImage, parameters: InputParameters, executor: Optional[Executor]):
+    # Rotate and crop each lead (only the lead regions are warped, not the whole page)
+    leadImages = mapLeads(
+        lambda lead: cropLead(inputImage, parameters.rotation, Rectangle(lead.x, lead.y, lead.width, lead.height)),
+        parameters.leads,
+        executor,
+    )
 
     extractSignal = ecgdigitize.digitizeSignal
-    extractGrid   = ecgdigitize.digitizeGrid
 
     # Map all lead images to signal data
-    signals = {
-        leadId: extractSignal(leadImage)
-        for leadId, leadImage in leadImages.items()
-    }
+    signals = mapLeads(extractSignal, leadImages, executor)
 
     # If all signals failed -> Failure
     if all([isinstance(signal, common.Failure) for _, signal in signals.items()]):
         return None, None
 
-    previews = {
-        leadId: visualization.overlaySignalOnImage(signal, image)
-        for (leadId, image), (_, signal) in zip(leadImages.items(), signals.items())
-    }
+    previews = mapLeads(
+        lambda signalAndImage: visualization.overlaySignalOnImage(*signalAndImage),
+        {leadId: (signals[leadId], leadImages[leadId]) for leadId in leadImages},
+        executor,
+    )
 
-    # Map leads to grid size estimates
-    gridSpacings = {
-        leadId: extractGrid(leadImage)
-        for leadId, leadImage in leadImages.items()
-    }
-    # Just got successful spacings
-    spacings = [spacing for spacing in gridSpacings.values() if not isinstance(spacing, common.Failure)]
+    gridHeightInPixels = estimateGridSize(inputImage, parameters, leadImages, executor)
 
-    if len(spacings) == 0:
+    if gridHeightInPixels is None:
         return None, None
 
-    samplingPeriodInPixels = gridHeightInPixels = common.mean(spacings)
+    samplingPeriodInPixels = gridHeightInPixels
 
     # Scale signals
     # TODO: Pass in the grid size in mm
@@ -84,6 +111,103 @@ def convertECGLeads(inputImage: ColorImage, parameters: InputParameters):
     return fullSignals, previews
 
 
+def mapLeads(function: Callable[[A], B], leads: Dict[LeadId, A], executor: Optional[Executor] = None) -> Dict[LeadId, B]:
+    """Applies `function` to the value of every lead, in `executor` if given."""
+    if executor is None:
+        return {leadId: function(value) for leadId, value in leads.items()}
+    else:
+        return dict(zip(leads.keys(), executor.map(function, leads.values())))
+
+
+def cropLead(inputImage: ColorImage, rotation: float, region: Rectangle) -> ColorImage:
+    if rotation == 0:
+        return ecgdigitize.image.cropped(inputImage, region)
+    else:
+        return ecgdigitize.image.rotatedAndCropped(inputImage, rotation, region)
+
+
+def estimateGridSize(
+    inputImage: ColorImage,
+    parameters: InputParameters,
+    leadImages: Dict[LeadId, ColorImage],
+    executor: Optional[Executor] = None,
+) -> Optional[float]:
+    """Estimates the grid size once for the page (within the lead regions), falling back to estimating it for each lead
+    and averaging when the page estimate is unreliable. Leads whose own estimate disagrees with the page's are reported.
+
+    Page estimates are cached for images from the decoded image cache (see `ImageCache`), by the file they were decoded
+    from and the rotation, so re-digitizing a page (e.g. after moving a lead) doesn't estimate its grid again; only the
+    moved leads' own estimates are made again, to check them against it.
+
+    Returns:
+        Optional[float]: The grid size in pixels, or None if it couldn't be estimated.
+    """
+    regions = {
+        leadId: Rectangle(lead.x, lead.y, lead.width, lead.height) for leadId, lead in parameters.leads.items()
+    }
+    imageKey = imageCache.keyOf(inputImage.data)
+    key = (imageKey, parameters.rotation)
+
+    cached = None
+    if imageKey is not None:
+        with _pageGridLock:
+            cached = _pageGridCache.get(key)
+            if cached is not None:
+                _pageGridCache.move_to_end(key)
+                regionSpacings = dict(cached[1])
+
+    if cached is None:
+        ownSpacings: List[Optional[float]] = []
+        pageSpacing = ecgdigitize.digitizeRegionsGrid(list(leadImages.values()), regionSpacings=ownSpacings)
+        regionSpacings = dict(zip((regions[leadId] for leadId in leadImages), ownSpacings))
+    else:
+        pageSpacing = cached[0]
+        moved = [leadId for leadId in leadImages if regions[leadId] not in regionSpacings]
+        if len(moved) > 0:
+            ownSpacings = []
+            ecgdigitize.digitizeRegionsGrid([leadImages[leadId] for leadId in moved], regionSpacings=ownSpacings)
+            regionSpacings.update(zip((regions[leadId] for leadId in moved), ownSpacings))
+
+    if not isinstance(pageSpacing, common.Failure):
+        # Only reliable estimates are kept, so a page whose leads were badly placed at first is estimated again
+        if imageKey is not None:
+            with _pageGridLock:
+                _pageGridCache[key] = (pageSpacing, regionSpacings)
+                _pageGridCache.move_to_end(key)
+                if len(_pageGridCache) > PAGE_GRID_CACHE_SIZE:
+                    _pageGridCache.popitem(last=False)
+
+        for leadId in leadImages:
+            ownSpacing = regionSpacings[regions[leadId]]
+            if ownSpacing is None:
+                print(f"Warning: Lead {leadId.name}: Unable to estimate its own grid size")
+            elif abs(ownSpacing - pageSpacing) > GRID_DISAGREEMENT_WARNING * pageSpacing:
+                print(f"Warning: Lead {leadId.name}'s grid size ({ownSpacing:.2f}px) disagrees with the page's ({pageSpacing:.2f}px)")
+
+        return pageSpacing
+
+    print(f"Warning: {pageSpacing.reason} Estimating the grid for each lead instead.")
+
+    # Map leads to grid size estimates
+    gridSpacings = mapLeads(ecgdigitize.digitizeGrid, leadImages, executor)
+    # Just got successful spacings
+    spacings = [spacing for spacing in gridSpacings.values() if not isinstance(spacing, common.Failure)]
+
+    if len(spacings) == 0:
+        return None
+
+    # Leads are checked against the median, so one bad estimate doesn't make the others look off
+    consensus = float(np.median(spacings))
+
+    for leadId, spacing in gridSpacings.items():
+        if isinstance(spacing, common.Failure):
+            print(f"Warning: Lead {leadId.name}: {spacing.reason}")
+        elif abs(spacing - consensus) > GRID_DISAGREEMENT_WARNING * consensus:
+            print(f"Warning: Lead {leadId.name}'s grid size ({spacing:.2f}px) disagrees with the other leads ({consensus:.2f}px)")
+
+    return common.mean(spacings)
+
+
 def exportSignals(leadSignals, filePath, separator='\t'):
     """Exports a dict of lead signals to file
 
@@ -0,0 +1,151 @@
+"""
+ImageCache.py
+Created October 18, 2026
+
+Process-wide cache of decoded images, so a file opened by both the editor and the digitization pipeline is only decoded
+(or, for PDFs, rasterized) once.
+"""
+from collections import OrderedDict
+from pathlib import Path
+import threading
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_BYTE_BUDGET = 512 * 2**20  # 512 MB, about five 600 dpi letter pages
+
+# (Resolved path, variant, modification time in ns, size in bytes)
+CacheKey = Tuple[str, Hashable, int, int]
+
+
+class DecodedImageCache:
+    """LRU cache of decoded images keyed by path, modification time and file size (so edited files are decoded again),
+    evicting the least recently used images once their total size exceeds `byteBudget`.
+
+    The cached arrays are shared between every caller, so they are made read-only: modifying one in place raises
+    instead of quietly changing the image for everyone else.
+    """
+
+    def __init__(self, byteBudget: int = DEFAULT_BYTE_BUDGET):
+        self.byteBudget = byteBudget
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[CacheKey, np.ndarray]" = OrderedDict()
+        self._keysByPath: Dict[Tuple[str, Hashable], CacheKey] = {}
+        self._keysByImage: Dict[int, CacheKey] = {}  # By `id` of the cached array
+        self._currentBytes = 0
+        self._lock = threading.Lock()
+        # Decodes in progress, so other threads asking for the same image wait for it instead of decoding it again
+        self._decoding: Dict[CacheKey, threading.Event] = {}
+
+    @property
+    def currentBytes(self) -> int:
+        return self._currentBytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        path: Path,
+        decode: Callable[[Path], Optional[np.ndarray]],
+        variant: Hashable = None,
+    ) -> Optional[np.ndarray]:
+        """Returns the decoded image at `path`, calling `decode(path)` if it isn't cached (or the file has changed).
+        Failed decodes (`None`) aren't cached. Concurrent calls for the same image only decode it once. The returned
+        array is read-only (even if it didn't fit the budget), so copy it to modify it.
+
+        `variant` distinguishes different decodes of the same file (e.g. the page and DPI of a PDF).
+        """
+        key = self._key(path, variant)
+
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+
+                decoding = self._decoding.get(key)
+                if decoding is None:
+                    self.misses += 1
+                    decoding = self._decoding[key] = threading.Event()
+                    break
+
+            # Another thread is decoding this image (e.g. the prefetcher). Once it's done the image is cached, unless
+            # it failed or didn't fit the budget, in which case this thread decodes it itself.
+            decoding.wait()
+
+        try:
+            # Decoding can take a while (especially PDFs), so it happens outside the lock
+            image = decode(path)
+
+            if image is not None:
+                image.flags.writeable = False
+                with self._lock:
+                    self._insert(key, image)
+        finally:
+            with self._lock:
+                del self._decoding[key]
+            decoding.set()
+
+        return image
+
+    def keyOf(self, image: np.ndarray) -> Optional[CacheKey]:
+        """The key `image` is cached under, if it is one of the cached arrays (not a copy of one), otherwise None.
+
+        The key identifies the file's contents as of decoding, so it can stand in for hashing the image (e.g. to cache
+        results computed from it).
+        """
+        with self._lock:
+            key = self._keysByImage.get(id(image))
+            if key is not None and self._entries.get(key) is image:
+                return key
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keysByPath.clear()
+            self._keysByImage.clear()
+            self._currentBytes = 0
+
+    def resetCounters(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _key(self, path: Path, variant: Hashable) -> CacheKey:
+        stat = path.stat()
+        return (str(path.resolve()), variant, stat.st_mtime_ns, stat.st_size)
+
+    def _insert(self, key: CacheKey, image: np.ndarray) -> None:
+        # An older version of the same file will never be hit again
+        staleKey = self._keysByPath.get(key[:2])
+        if staleKey is not None and staleKey != key:
+            self._remove(staleKey)
+
+        if key in self._entries or image.nbytes > self.byteBudget:
+            return
+
+        self._entries[key] = image
+        self._keysByPath[key[:2]] = key
+        self._keysByImage[id(image)] = key
+        self._currentBytes += image.nbytes
+
+        while self._currentBytes > self.byteBudget:
+            oldestKey = next(iter(self._entries))
+            self._remove(oldestKey)
+
+    def _remove(self, key: CacheKey) -> None:
+        image = self._entries.pop(key)
+        del self._keysByImage[id(image)]
+        self._currentBytes -= image.nbytes
+        if self._keysByPath.get(key[:2]) == key:
+            del self._keysByPath[key[:2]]
+
+
+# Shared by the views and `ecgdigitize.image.openImage` (through `ImageUtilities.readImage`)
+imageCache = DecodedImageCache()
@@ -4,25 +4,41 @@ Created November 9, 2020
 
 -
 """
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+import threading
+from typing import List, Optional, Tuple
 
 import cv2
 import numpy as np
-from PyQt5 import QtGui
 import scipy.stats as stats
 import pdf2image as pdf2image
 #import pdfplumber as pdfplumber
 
+from ImageCache import imageCache
 
-def readImage(path: Path) -> np.ndarray:
-    if path.suffix == '.pdf':
+
+DEFAULT_PDF_DPI = 200
+
+
+def readImage(path: Path, pdfPage: int = 1, pdfDPI: int = DEFAULT_PDF_DPI) -> np.ndarray:
+    """Decodes the image (or one page of the PDF) at `path`, reusing the decoded image if the same file was already
+    read (see `ImageCache`). The returned array is shared and read-only, so copy it to modify it.
+    """
+    if path.suffix.lower() == '.pdf':
         #return _pdfPlumber(path)
-        return _pdf2png(path)
+        return imageCache.get(path, lambda path: _pdf2png(path, pdfPage, pdfDPI), variant=(pdfPage, pdfDPI))
     else:
-        return cv2.imread(str(path.absolute()))
+        return imageCache.get(path, _decodeImage)
+
+
+def _decodeImage(path: Path) -> np.ndarray:
+    return cv2.imread(str(path.absolute()))
 
 def opencvImageToPixmap(image):
+    # Imported here so that decoding images (and with it `ecgdigitize`) doesn't depend on Qt, e.g. for headless batches
+    from PyQt5 import QtGui
+
     # Uses a np array image
     # SOURCE: https://stackoverflow.com/a/50800745/7737644 (Creative Commons - Credit, share-alike)
 
@@ -41,16 +57,100 @@ def opencvImageToPixmap(image):
 
     return pixmap
 
-def _pdf2png(pdfPath: Path) -> np.ndarray:
-    # https://stackoverflow.com/questions/14134892/convert-image-from-pil-to-opencv-format 
+class ImagePyramid:
+    """Successively halved copies of an image (level 0 is the image itself), built lazily with area averaging, for
+    drawing large images at low zoom without touching every full resolution pixel (see `views.TiledImageItem`).
+
+    Levels are only added until one fits within `smallestSize` pixels. Building them is thread-safe, so a pyramid can
+    be prepared in the background (see `ImagePrefetcher`). The arrays are shared, so they must not be modified in place.
+    """
+
+    def __init__(self, image: np.ndarray, smallestSize: int = 512):
+        self.width = image.shape[1]
+        self.height = image.shape[0]
+
+        self.levelCount = 1
+        while max(self.width, self.height) > smallestSize << (self.levelCount - 1):
+            self.levelCount += 1
+
+        self._levels = [image]
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the downsampled levels (not counting the image itself)."""
+        return sum(level.nbytes for level in self._levels[1:])
+
+    def level(self, index: int) -> np.ndarray:
+        """The image downsampled by `2**index` (clamped to the available levels)."""
+        index = min(max(index, 0), self.levelCount - 1)
+
+        with self._lock:
+            while len(self._levels) <= index:
+                previous = self._levels[-1]
+                size = ((previous.shape[1] + 1) // 2, (previous.shape[0] + 1) // 2)
+                self._levels.append(cv2.resize(previous, size, interpolation=cv2.INTER_AREA))
+
+            return self._levels[index]
+
+    def buildLevels(self) -> None:
+        self.level(self.levelCount - 1)
+
+
+def _pdf2png(pdfPath: Path, page: int = 1, dpi: int = DEFAULT_PDF_DPI) -> np.ndarray:
     # Poppler must be in dependencies
+    return rasterizePdf(pdfPath, firstPage=page, lastPage=page, dpi=dpi)[0]
+
+
+def pdfPageCount(pdfPath: Path) -> int:
+    return int(pdf2image.pdfinfo_from_path(str(pdfPath.absolute()))["Pages"])
+
+
+def rasterizePdf(
+    pdfPath: Path,
+    firstPage: int = 1,
+    lastPage: Optional[int] = None,
+    dpi: int = DEFAULT_PDF_DPI,
+    threadCount: int = 1,
+) -> List[np.ndarray]:
+    """Rasterizes the pages `firstPage` to `lastPage` (inclusive, 1-indexed) of a PDF into BGR images. Only the requested
+    pages are rendered.
+
+    Args:
+        pdfPath (Path): The PDF.
+        firstPage (int, optional): The first page to rasterize. Defaults to 1.
+        lastPage (Optional[int], optional): The last page to rasterize. Defaults to None (the last page of the PDF).
+        dpi (int, optional): The resolution to rasterize at. Defaults to 200.
+        threadCount (int, optional): If greater than 1, the pages are rasterized in a thread pool of this size, one
+            poppler process per page. Defaults to 1.
+
+    Returns:
+        List[np.ndarray]: The pages, in order.
+    """
+    if lastPage is None:
+        lastPage = pdfPageCount(pdfPath)
+
+    def rasterize(first: int, last: int) -> List[np.ndarray]:
+        pilImages = pdf2image.convert_from_path(str(pdfPath.absolute()), dpi, first_page=first, last_page=last)
+        return [_pilToBGR(pilImage) for pilImage in pilImages]
+
+    pages = list(range(firstPage, lastPage + 1))
+
+    if threadCount > 1 and len(pages) > 1:
+        with ThreadPoolExecutor(max_workers=threadCount) as executor:
+            return [image for images in executor.map(lambda page: rasterize(page, page), pages) for image in images]
+    else:
+        return rasterize(firstPage, lastPage)
+
+
+def _pilToBGR(pilImage) -> np.ndarray:
+    # https://stackoverflow.com/questions/14134892/convert-image-from-pil-to-opencv-format
+    # Converts straight into a new BGR array (instead of converting to RGB, copying into an array and copying again to
+    # reverse the channels)
+    if pilImage.mode != 'RGB':
+        pilImage = pilImage.convert('RGB')
 
-    # Only convert first page
-    dpi = 200   # Default is 200
-    pdfPilImage = pdf2image.convert_from_path(str(pdfPath.absolute()), dpi)[0].convert('RGB')
-    open_cv_image = np.array(pdfPilImage)
-    open_cv_image = open_cv_image[:, :, ::-1].copy()
-    return open_cv_image
+    return cv2.cvtColor(np.asarray(pilImage), cv2.COLOR_RGB2BGR)
 
 #def _pdfPlumber(pdfPath: Path) -> np.ndarray:
 #    with pdfplumber.open(pdfPath) as pdf:
@@ -0,0 +1,182 @@
+"""
+DigitizationWorker.py
+Created October 18, 2026
+
+Runs digitization on a `QThreadPool` instead of the Qt main thread, reporting back through signals (which are delivered
+on the main thread) so the window stays responsive.
+"""
+import abc
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import List
+
+from PyQt5 import QtCore
+
+import ecgdigitize
+from Conversion import DEFAULT_LEAD_WORKERS, convertECGLeads, cropLead
+from ecgdigitize import batch, manifest
+from ecgdigitize.image import ColorImage, Rectangle
+import ImageUtilities
+from model.InputParameters import InputParameters
+
+
+class WorkerSignals(QtCore.QObject):
+    """Signals of a `DigitizationWorker` (a `QRunnable` isn't a `QObject`, so it can't define them itself)."""
+    progress = QtCore.pyqtSignal(int, int, float)  # Files finished, total files, files per minute
+    fileFinished = QtCore.pyqtSignal(object)  # batch.FileResult
+    pageResult = QtCore.pyqtSignal(object, object)  # Signals and previews (`convertECGLeads`)
+    leadResult = QtCore.pyqtSignal(object, object)  # Region and signal (`LeadPreviewWorker`)
+    error = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+    finished = QtCore.pyqtSignal()  # Always emitted last, whether the work succeeded, failed or was cancelled
+
+
+class _WorkerMeta(type(QtCore.QRunnable), abc.ABCMeta):  # type: ignore
+    """Lets `DigitizationWorker` have abstract methods (a `QRunnable`'s metaclass is sip's, not `ABCMeta`)."""
+
+
+class DigitizationWorker(QtCore.QRunnable, metaclass=_WorkerMeta):
+    """Base class for the workers: runs `work` (which subclasses implement) and reports any exception through
+    `signals.error`.
+
+    Cancellation is cooperative: `cancel` only takes effect once the worker reaches its next check (e.g. between files),
+    since OpenCV and NumPy calls can't be interrupted.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.signals = WorkerSignals()
+        self._cancelRequested = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelRequested.set()
+
+    @property
+    def isCancelled(self) -> bool:
+        return self._cancelRequested.is_set()
+
+    def run(self) -> None:
+        try:
+            self.work()
+        except Exception as exception:
+            traceback.print_exc()
+            self.signals.error.emit(f"{type(exception).__name__}: {exception}")
+        finally:
+            self.signals.finished.emit()
+
+    @abc.abstractmethod
+    def work(self) -> None:
+        """Does the work on the worker thread, emitting the subclass's result signal unless cancelled."""
+
+
+class PageDigitizationWorker(DigitizationWorker):
+    """Digitizes the leads of one page (see `convertECGLeads`), emitting `pageResult` unless cancelled."""
+
+    def __init__(self, inputImage: ColorImage, parameters: InputParameters) -> None:
+        super().__init__()
+        self.inputImage = inputImage
+        self.parameters = parameters
+
+    def work(self) -> None:
+        signals, previews = convertECGLeads(self.inputImage, self.parameters, leadWorkers=DEFAULT_LEAD_WORKERS)
+
+        if self.isCancelled:
+            self.signals.cancelled.emit()
+        else:
+            self.signals.pageResult.emit(signals, previews)
+
+
+class FolderDigitizationWorker(DigitizationWorker):
+    """Digitizes every page of each file (see `batch.digitizeFiles`), writing `exported_leads` and `image_previews` to
+    `outputDirectory`, and emitting `fileFinished` and `progress` after each file. Files that failed (entirely or on
+    some pages) are collected in `failedFiles`.
+
+    Like the batch CLI, each file is recorded in the manifest at `manifestPath` (with the same settings digest, so the
+    two share it), and files that are up to date in it are skipped and collected in `skippedFiles`.
+    """
+
+    def __init__(
+        self,
+        files: List[Path],
+        parameters: InputParameters,
+        outputDirectory: Path,
+        manifestPath: Path,
+        separator: str = ',',
+    ) -> None:
+        super().__init__()
+        self.files = files
+        self.parameters = parameters
+        self.outputDirectory = outputDirectory
+        self.manifestPath = manifestPath
+        self.separator = separator
+        self.failedFiles: List[Path] = []
+        self.skippedFiles: List[Path] = []
+
+    def work(self) -> None:
+        pdfDPI = ImageUtilities.DEFAULT_PDF_DPI
+        batchManifest = manifest.BatchManifest(self.manifestPath)
+        settingsHash = manifest.settingsDigest(self.parameters, separator=self.separator, pdfDPI=pdfDPI, previews=True)
+
+        contentHashes, self.skippedFiles, unreadable = batch.hashFiles(self.files, batchManifest, settingsHash)
+
+        # Files that couldn't be read fail on their own, like files that couldn't be digitized
+        for result in unreadable:
+            self.failedFiles.append(result.path)
+            self.signals.fileFinished.emit(result)
+
+        if self.isCancelled:
+            self.signals.cancelled.emit()
+            return
+
+        files = list(contentHashes)
+        finishedEarly = len(self.skippedFiles) + len(unreadable)
+        if finishedEarly > 0:
+            self.signals.progress.emit(finishedEarly, len(self.files), 0.0)
+
+        start = time.perf_counter()
+        results = batch.digitizeFiles(
+            files, self.parameters, self.outputDirectory, previews=True, separator=self.separator, pdfDPI=pdfDPI
+        )
+
+        for digitized, result in enumerate(results, start=1):
+            if not batch.recordResult(batchManifest, result, contentHashes[result.path], settingsHash):
+                self.failedFiles.append(result.path)
+            self.signals.fileFinished.emit(result)
+
+            # Skipped and unreadable files count as finished, but not towards the rate
+            elapsed = time.perf_counter() - start
+            filesPerMinute = digitized / elapsed * 60 if elapsed > 0 else 0.0
+            self.signals.progress.emit(finishedEarly + digitized, len(self.files), filesPerMinute)
+
+            if self.isCancelled and digitized < len(files):
+                self.signals.cancelled.emit()
+                return
+
+
+class LeadPreviewWorker(DigitizationWorker):
+    """Extracts the signal of a single lead region (see `LivePreviewController`), emitting `leadResult` with the region
+    and the signal (or `common.Failure`) unless cancelled. Only the region is rotated (see `cropLead`), and the grid
+    isn't needed to show the trace, so this costs a fraction of digitizing the page.
+    """
+
+    def __init__(self, inputImage: ColorImage, rotation: float, region: Rectangle) -> None:
+        super().__init__()
+        self.inputImage = inputImage
+        self.rotation = rotation
+        self.region = region
+
+    def work(self) -> None:
+        # Jobs are usually superseded while they're still queued, so check before doing anything
+        if self.isCancelled:
+            self.signals.cancelled.emit()
+            return
+
+        leadImage = cropLead(self.inputImage, self.rotation, self.region)
+        signal = ecgdigitize.digitizeSignal(leadImage)
+
+        if self.isCancelled:
+            self.signals.cancelled.emit()
+        else:
+            self.signals.leadResult.emit(self.region, signal)
@@ -1,5 +1,6 @@
 from pathlib import Path
 from controllers import MainController
+from controllers.ImagePrefetcher import ImagePrefetcher
 from ecgdigitize.image import openImage
 from itertools import chain
 
@@ -10,6 +11,7 @@ class FolderController:
         self.mainController : MainController = mainController
         self.imageFiles : list[Path] = []
         self.currentImageIndex = -1
+        self.prefetcher = ImagePrefetcher()
 
     def loadImagesFromFolder(self, directory: Path):
         '''Loads all of the files in a folder'''
@@ -22,6 +24,8 @@ class FolderController:
         self.imageFiles = list(sorted(chain(directory.glob('*.png'), directory.glob('*.jpg'), directory.glob('*.jpeg'), directory.glob('*.tif'), directory.glob('*.tiff'), directory.glob("*.pdf"))))
         self.currentImageIndex = 0  # Starting from first image
         #self.loadCurrentImage()     
+        self.prefetcher.clear()
+        self.prefetcher.prefetchAround(self.imageFiles, self.currentImageIndex)
 
     def openFolderThenLoad(self):
         '''Opens a folder dialog'''
@@ -33,11 +37,16 @@ class FolderController:
         '''Loads the current image into the view'''
         if self.currentImageIndex >= 0 and self.currentImageIndex < len(self.imageFiles):
             currentFile = self.imageFiles[self.currentImageIndex]
-            self.mainController.window.editor.loadImageFromPath(currentFile)
+            # Decoded in the background if it was a neighbor of the previous image (see `ImagePrefetcher`), and decoded
+            # only once either way, since `openImage` reuses the editor's decode
+            preparedImage = self.prefetcher.preparedImage(currentFile)
+            self.mainController.window.editor.loadImageFromPath(currentFile, preparedImage)
             self.mainController.window.editor.resetImageEditControls()
             self.mainController.openFile = currentFile
             self.mainController.openImage = openImage(currentFile)
             self.mainController.attempToLoadAnnotations()
+            self.mainController.livePreviewController.refreshAll()
+            self.prefetcher.prefetchAround(self.imageFiles, self.currentImageIndex)
         else:
             print("No images left to display")
 
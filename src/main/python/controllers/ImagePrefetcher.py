@@ -0,0 +1,110 @@
+"""
+ImagePrefetcher.py
+Created October 18, 2026
+
+Decodes the images next to the current one in the background, so stepping through a folder doesn't wait on decoding.
+"""
+from pathlib import Path
+import threading
+from typing import Dict, List, Optional, Set
+
+from PyQt5 import QtCore
+
+import ImageUtilities
+from views.TiledImageItem import TILE_SIZE
+
+
+DEFAULT_AHEAD = 2
+DEFAULT_BEHIND = 1
+DEFAULT_BYTE_BUDGET = 128 * 2**20  # For the pyramids; the decoded arrays count against `ImageCache`'s budget
+
+
+class _Task(QtCore.QRunnable):
+    def __init__(self, function, *arguments) -> None:
+        super().__init__()
+        self.function = function
+        self.arguments = arguments
+
+    def run(self) -> None:
+        self.function(*self.arguments)
+
+
+class ImagePrefetcher:
+    """Keeps the `ahead` images after and `behind` images before the current one ready to display.
+
+    Each neighbor is decoded into the shared decoded image cache (so `ImageUtilities.readImage` and `openImage` return
+    immediately for it), and its pyramid is built (see `TiledImageItem`), so the view can show it without downsampling
+    it first. The pyramids are held until they are taken with `preparedImage` or the neighbor falls out of range, up to
+    `byteBudget` in total.
+    """
+
+    def __init__(self, ahead: int = DEFAULT_AHEAD, behind: int = DEFAULT_BEHIND, byteBudget: int = DEFAULT_BYTE_BUDGET):
+        self.ahead = ahead
+        self.behind = behind
+        self.byteBudget = byteBudget
+
+        # One thread, so the next image is always ready first and the prefetching doesn't compete with digitization
+        self._pool = QtCore.QThreadPool()
+        self._pool.setMaxThreadCount(1)
+
+        self._lock = threading.Lock()
+        self._wanted: List[Path] = []
+        self._pending: Set[Path] = set()
+        self._prepared: Dict[Path, ImageUtilities.ImagePyramid] = {}
+
+    def prefetchAround(self, files: List[Path], index: int) -> None:
+        """Starts preparing the neighbors of `files[index]` (nearest first, the next ones before the previous ones),
+        dropping any prepared image that is no longer a neighbor.
+        """
+        neighbors = files[index + 1:index + 1 + self.ahead] + files[max(0, index - self.behind):index][::-1]
+
+        with self._lock:
+            self._wanted = neighbors
+            for path in list(self._prepared):
+                if path not in neighbors:
+                    del self._prepared[path]
+
+            newPaths = [path for path in neighbors if path not in self._prepared and path not in self._pending]
+            self._pending.update(newPaths)
+
+        # Tasks still queued for earlier neighbors return as soon as they start (see `_prepare`)
+        for path in newPaths:
+            self._pool.start(_Task(self._prepare, path))
+
+    def preparedImage(self, path: Path) -> Optional[ImageUtilities.ImagePyramid]:
+        """The pyramid of `path` if it has been prepared (removing it from the prefetcher), otherwise None."""
+        with self._lock:
+            return self._prepared.pop(path, None)
+
+    def clear(self) -> None:
+        self._pool.clear()
+        with self._lock:
+            self._wanted = []
+            self._pending.clear()
+            self._prepared.clear()
+
+    def _prepare(self, path: Path) -> None:
+        with self._lock:
+            self._pending.discard(path)
+            if path not in self._wanted:
+                return
+
+        try:
+            data = ImageUtilities.readImage(path)
+            if data is not None:
+                preparedImage = ImageUtilities.ImagePyramid(data, TILE_SIZE)
+                preparedImage.buildLevels()
+            else:
+                preparedImage = None
+        except Exception as exception:
+            # It'll fail again (and be reported) when it is actually opened
+            print(f"Warning: Couldn't prefetch {path.name}: {exception}")
+            return
+
+        if preparedImage is None:
+            return
+
+        with self._lock:
+            preparedBytes = sum(pyramid.nbytes for pyramid in self._prepared.values())
+            if path in self._wanted and preparedBytes + preparedImage.nbytes <= self.byteBudget:
+                self._prepared[path] = preparedImage
@@ -0,0 +1,120 @@
+"""
+LivePreviewController.py
+Created October 18, 2026
+
+Live preview mode: while it is on, the extracted trace of each lead is drawn over its region in the image view, and
+redrawn shortly after the region is moved or resized (or the rotation changes), so regions can be tuned without
+digitizing the whole page.
+"""
+from typing import Dict
+
+from PyQt5 import QtCore
+
+from controllers.DigitizationWorker import LeadPreviewWorker
+from ecgdigitize import common
+from ecgdigitize.image import Rectangle
+from model.Lead import LeadId
+
+
+# How long a region has to stay still before its lead is digitized
+PREVIEW_DELAY_MS = 250
+PREVIEW_WORKERS = 2
+
+
+class LivePreviewController:
+
+    def __init__(self, mainController):
+        self.mainController = mainController
+        self.enabled = False
+
+        # Per lead (by name): the debounce timer and the job whose result is current
+        self._timers: Dict[str, QtCore.QTimer] = {}
+        self._workers: Dict[str, LeadPreviewWorker] = {}
+
+        # Separate from the global pool, so previews never wait behind (or hold up) a full digitization
+        self._pool = QtCore.QThreadPool()
+        self._pool.setMaxThreadCount(PREVIEW_WORKERS)
+
+    @property
+    def imageViewer(self):
+        return self.mainController.window.editor.imageViewer
+
+    def setEnabled(self, enabled: bool):
+        self.enabled = enabled
+
+        if enabled:
+            self.refreshAll()
+        else:
+            self.clear()
+
+    def roiChanged(self, roi):
+        """Schedules the lead of the moved/resized `ROIItem`, hiding its (now misplaced) trace in the meantime."""
+        if not self.enabled:
+            return
+
+        self.imageViewer.removeLeadTrace(roi.leadId)
+        self.schedule(roi.leadId)
+
+    def refreshAll(self):
+        """Schedules every lead, e.g. after the image or the rotation changed."""
+        if not self.enabled:
+            return
+
+        self.imageViewer.removeAllLeadTraces()
+        for leadId in self.imageViewer.getAllLeadRoisAsDict():
+            self.schedule(leadId.name)
+
+    def clear(self):
+        for leadId in list(self._timers):
+            self._timers[leadId].stop()
+            self._cancel(leadId)
+        self.imageViewer.removeAllLeadTraces()
+
+    def schedule(self, leadId: str):
+        """(Re)starts the lead's debounce timer, cancelling its job if one is still running."""
+        self._cancel(leadId)
+
+        if leadId not in self._timers:
+            timer = QtCore.QTimer()
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda: self._start(leadId))
+            self._timers[leadId] = timer
+
+        self._timers[leadId].start(PREVIEW_DELAY_MS)
+
+    def _start(self, leadId: str):
+        inputImage = self.mainController.openImage
+        lead = self.imageViewer.getAllLeadRoisAsDict().get(LeadId[leadId])
+
+        if inputImage is None or lead is None:
+            return
+
+        rotation = self.mainController.window.editor.EditPanelGlobalView.getRotation()
+        worker = LeadPreviewWorker(inputImage, rotation, Rectangle(lead.x, lead.y, lead.width, lead.height))
+        worker.signals.leadResult.connect(lambda region, signal: self._showTrace(leadId, worker, region, signal))
+
+        self._workers[leadId] = worker
+        self._pool.start(worker)
+
+    def _showTrace(self, leadId: str, worker: LeadPreviewWorker, region: Rectangle, signal):
+        # Results of superseded jobs (and of leads that were deleted in the meantime) are dropped
+        if self._workers.get(leadId) is not worker:
+            return
+        del self._workers[leadId]
+
+        if not self.enabled or LeadId[leadId] not in self.imageViewer.getAllLeadRoisAsDict():
+            return
+
+        if isinstance(signal, common.Failure):
+            print(f"Warning: Lead {leadId}: {signal.reason}")
+            return
+        elif signal is None:
+            print(f"Warning: Lead {leadId}: No signal found")
+            return
+
+        self.imageViewer.setLeadTrace(leadId, region.x, region.y, signal)
+
+    def _cancel(self, leadId: str):
+        worker = self._workers.pop(leadId, None)
+        if worker is not None:
+            worker.cancel()
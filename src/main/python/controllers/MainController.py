@@ -6,20 +6,23 @@ Controls the primary window, including the menu bar and the editor.
 """
 from pathlib import Path
 import os
+from typing import Callable, List, Optional
 
 import cv2
 import json
 import dataclasses
 import webbrowser
-from PyQt5 import QtWidgets, QtGui
+from PyQt5 import QtCore, QtWidgets, QtGui
 from PyQt5.QtWidgets import QFileDialog
 
 from ecgdigitize.image import ColorImage, openImage
 import ImageUtilities
 from itertools import chain
 
-from Conversion import convertECGLeads, exportSignals
+from Conversion import exportSignals
+from controllers.DigitizationWorker import DigitizationWorker, FolderDigitizationWorker, PageDigitizationWorker
 from controllers.FolderController import FolderController
+from controllers.LivePreviewController import LivePreviewController
 from views.MainWindow import MainWindow
 from views.ImageView import *
 from views.EditorWidget import *
@@ -31,7 +34,8 @@ import Annotation
 from model.Lead import Lead, LeadId
 import datetime
 from model.InputParameters import InputParameters
-import ecgdigitize.image as image
+from ecgdigitize import batch
+from ecgdigitize.manifest import fileDigest
 
 import traceback
 
@@ -40,6 +44,7 @@ class MainController:
     def __init__(self):
         self.window = MainWindow(self)
         self.folderController = FolderController(self)
+        self.livePreviewController = LivePreviewController(self)
         self.connectUI()
         self.openFile = None
 
@@ -49,6 +54,10 @@ class MainController:
 
         self.openImage: Optional[ColorImage] = None
 
+        # Digitization runs in the background (see `DigitizationWorker`); only one run at a time
+        self.worker: Optional[DigitizationWorker] = None
+        self.progressDialog: Optional[QtWidgets.QProgressDialog] = None
+
     def connectUI(self):
         """
         Hook UI up to handlers in the controller
@@ -69,6 +78,11 @@ class MainController:
         self.window.preset1.triggered.connect(self.loadPreset1)
         self.window.presetNone.triggered.connect(self.loadPresetNone)
 
+        # Live preview: redraws a lead's trace when its box moves, and every trace when the rotation changes
+        self.window.livePreview.toggled.connect(self.livePreviewController.setEnabled)
+        self.window.editor.imageViewer.updateRoiItem.connect(self.livePreviewController.roiChanged)
+        self.window.editor.EditPanelGlobalView.rotationSlider.valueChanged.connect(lambda _: self.livePreviewController.refreshAll())
+
         self.window.reportIssueButton.triggered.connect(lambda: webbrowser.open('https://github.com/Tereshchenkolab/paper-ecg/issues'))
         self.window.userGuideButton.triggered.connect(lambda: webbrowser.open('https://github.com/Tereshchenkolab/paper-ecg/blob/master/USER-GUIDE.md'))
 
@@ -84,6 +98,7 @@ class MainController:
             self.openFile = path
             self.openImage = openImage(path)
             self.attempToLoadAnnotations()
+            self.livePreviewController.refreshAll()
             self.folderController.loadImagesFromFolder(path.parent) # Queue up the other files in the folder
         else:
             print("[Warning] No image selected")
@@ -128,6 +143,7 @@ class MainController:
 
     def closeImageFile(self):
         """Closes out current image file and resets editor controls."""
+        self.livePreviewController.clear()
         self.window.editor.removeImage()
         self.window.editor.deleteAllLeadRois()
         self.window.editor.resetImageEditControls()
@@ -163,8 +179,11 @@ class MainController:
         if self.window.editor.image is None:
             raise Exception("IMAGE NOT AVAILABLE WHEN `processEcgData` CALLED")
 
-        extractedSignals, previewImages = convertECGLeads(self.openImage, inputParameters)
+        worker = PageDigitizationWorker(self.openImage, inputParameters)
+        worker.signals.pageResult.connect(self.showDigitizationResult)
+        self.startWorker(worker, "Digitizing leads...", total=0)
 
+    def showDigitizationResult(self, extractedSignals, previewImages):
         if extractedSignals is None:
             errorDialog = MessageDialog(
                 message="Error: Signal Processing Failed\n\nPlease check your lead selection boxes",
@@ -176,31 +195,6 @@ class MainController:
             if exportFileDialog.exec_():
                 self.exportECGData(exportFileDialog.fileExportPath, exportFileDialog.delimiterDropdown.currentText(), extractedSignals)
 
-    # we have all ECG data and export location - ready to pass off to backend to digitize
-    def processEcgDataNoDialog(self, inputParameters, filepath: Path, delimiter: str, previewImgPath: Path):
-        '''For calling the function without a file explorer dialog'''
-        if self.window.editor.image is None:
-            raise Exception("IMAGE NOT AVAILABLE WHEN `processEcgData` CALLED")
-
-        extractedSignals, previewImages = convertECGLeads(self.openImage, inputParameters)
-
-        if extractedSignals is None:
-            errorDialog = MessageDialog(
-                message="Error: Signal Processing Failed\n\nPlease check your lead selection boxes",
-                title="Error"
-            )
-            errorDialog.exec_()
-        else:
-            self.exportECGData(filepath, delimiter, extractedSignals)
-            print(f"Exported CSV to: {filepath}")
-            print(f"Exporting lead previews to: {previewImgPath}\[file]\[leadId]")
-            for lead, img in previewImages.items():
-                imgDirectory = previewImgPath / self.openFile.stem
-                imgDirectory.mkdir(exist_ok=True)   # Make directory if not existing
-                print(f"Saving img to: {imgDirectory / f'{filepath.name}_{lead.name}.jpg'}")
-                image.saveImage(img, imgDirectory / f"{filepath.name}_{lead.name}.jpg")
-
-
     def exportECGData(self, exportPath, delimiter, extractedSignals):
         seperatorMap = {"Comma":',', "Tab":'\t', "Space":' '}
         assert delimiter in seperatorMap, f"Unrecognized delimiter {delimiter}"
@@ -248,7 +242,11 @@ class MainController:
 
         Annotation.Annotation(
             timeStamp = currentDateTime,
-            image=Annotation.ImageMetadata(self.openFile.name, directory=str(self.openFile.parent.absolute())),
+            image=Annotation.ImageMetadata(
+                self.openFile.name,
+                directory=str(self.openFile.parent.absolute()),
+                hashValue=fileDigest(self.openFile),
+            ),
             rotation=inputParameters.rotation,
             timeScale=inputParameters.timeScale,
             voltageScale=inputParameters.voltScale,
@@ -376,37 +374,93 @@ class MainController:
         print(f"Directory: {directory}")
         print(f"Files: {files}")
 
-        ## TODO: Create a progress bar
-        self.progress = QtWidgets.QProgressBar()
-        #self.progress.setGeometry(200, 80, 250, 20)
-
-        ## Ensure an exported_leads file is created
-        exportDirectory = directory / 'exported_leads'
-        imagePreviewDirectory = directory / 'image_previews'
-        print(f"exportDir: {exportDirectory}")
-        if not exportDirectory.exists():
-            exportDirectory.mkdir()
-        if not imagePreviewDirectory.exists():
-            imagePreviewDirectory.mkdir()
-
-        for file in files:
-            print(f"Discovered {file}")
-            self.window.editor.loadImageFromPath(file)
-            self.openFile = file
-            self.openImage = openImage(file)
-
-            inputParameters = self.getCurrentInputParameters()
-
-            if len(inputParameters.leads) > 0:
-                #self.processEcgData(inputParameters)
-                self.processEcgDataNoDialog(inputParameters, exportDirectory / self.openFile.with_suffix(".csv").name, "Comma", imagePreviewDirectory)
+        inputParameters = self.getCurrentInputParameters()
+
+        if len(inputParameters.leads) == 0:
+            warningDialog = MessageDialog(
+                message="Warning: No data to process\n\nPlease select at least one lead to digitize",
+                title="Warning"
+            )
+            warningDialog.exec_()
+            return
+
+        # Every page of each file is digitized in the background, writing to `exported_leads` and `image_previews`, and
+        # files already digitized with these settings (per the same manifest as the batch CLI) are skipped
+        files = sorted(files)
+        manifestPath = batch.defaultManifestPath([directory], directory)
+        worker = FolderDigitizationWorker(files, inputParameters, directory, manifestPath, separator=',')
+        worker.signals.fileFinished.connect(self.reportFolderFile)
+        worker.signals.progress.connect(self.updateFolderProgress)
+        self.startWorker(
+            worker, f"Digitizing {len(files)} files...", total=len(files),
+            onFinished=lambda: self.reportFolderFailures(worker.failedFiles, worker.skippedFiles),
+        )
+
+    def startWorker(self, worker: DigitizationWorker, label: str, total: int, onFinished: Optional[Callable[[], None]] = None):
+        """Runs `worker` in the background behind a progress dialog, which cancels it if the user presses Cancel.
+
+        Args:
+            total (int): Number of steps the worker reports progress in, or 0 for a busy indicator.
+            onFinished (Optional[Callable[[], None]], optional): Called once the worker is done and the dialog is closed.
+        """
+        if self.worker is not None:
+            print("[Warning] Digitization is already running")
+            return
+
+        self.progressDialog = QtWidgets.QProgressDialog(label, "Cancel", 0, total, self.window)
+        self.progressDialog.setWindowTitle("Digitizing")
+        self.progressDialog.setWindowModality(QtCore.Qt.WindowModal)
+        self.progressDialog.setMinimumDuration(0)
+        self.progressDialog.canceled.connect(worker.cancel)
+        self.progressDialog.setValue(0)
+
+        worker.signals.error.connect(self.showDigitizationError)
+        worker.signals.cancelled.connect(lambda: print("Digitization cancelled"))
+        worker.signals.finished.connect(lambda: self.finishWorker(onFinished))
+
+        self.worker = worker
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def finishWorker(self, onFinished: Optional[Callable[[], None]] = None):
+        if self.progressDialog is not None:
+            # Disconnect first, since closing the dialog emits `canceled`
+            self.progressDialog.canceled.disconnect()
+            self.progressDialog.close()
+            self.progressDialog = None
+        self.worker = None
+
+        if onFinished is not None:
+            onFinished()
+
+    def showDigitizationError(self, message: str):
+        errorDialog = MessageDialog(message=f"Error: Digitization Failed\n\n{message}", title="Error")
+        errorDialog.exec_()
+
+    def reportFolderFile(self, result):
+        if result.error is not None:
+            print(f"[Error] {result.path}: {result.error}")
+        for page in result.pages:
+            if page.csvPath is None:
+                print(f"[Error] Signal processing failed for {page.stem}")
             else:
-                warningDialog = MessageDialog(
-                    message="Warning: No data to process\n\nPlease select at least one lead to digitize",
-                    title="Warning"
-                )
-                warningDialog.exec_()
-                break
+                print(f"Exported CSV to: {page.csvPath}")
+
+    def updateFolderProgress(self, finished: int, total: int, filesPerMinute: float):
+        if self.progressDialog is not None:
+            self.progressDialog.setValue(finished)
+            self.progressDialog.setLabelText(f"Digitized {finished} of {total} files ({filesPerMinute:.1f} files/min)")
+
+    def reportFolderFailures(self, failedFiles: List[Path], skippedFiles: List[Path]):
+        for file in skippedFiles:
+            print(f"Skipped (already digitized): {file}")
+
+        if len(failedFiles) > 0:
+            errorDialog = MessageDialog(
+                message="Error: Signal Processing Failed\n\nCouldn't digitize:\n"
+                    + "\n".join(file.name for file in failedFiles),
+                title="Error"
+            )
+            errorDialog.exec_()
 
     def getMetaDataDirectory(self):
         metadataDirectory = Path.cwd() / '.paperecg'
@@ -5,4 +5,5 @@ from .ecgdigitize import \
     digitizeSignal, \
     GridDetectionMethod, \
     GridExtractionMethod, \
-    digitizeGrid
\ No newline at end of file
+    digitizeGrid, \
+    digitizeRegionsGrid
\ No newline at end of file
@@ -0,0 +1,339 @@
+"""
+batch.py
+Created October 18, 2026
+
+Headless batch digitization: applies a preset (or saved annotation) to a set of images and writes one CSV per ECG,
+without the GUI (and without importing Qt), e.g. for running on servers without a display.
+
+Each finished file is recorded in a manifest (see `manifest.py`), and files that are unchanged since they were last
+digitized with the same settings are skipped, so an interrupted batch can simply be rerun.
+
+Usage (from `src/main/python`):
+    python -m ecgdigitize.batch --preset ../../../.paperecg/preset1.json path/to/folder [more/files.pdf ...]
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import dataclasses
+import json
+import os
+from pathlib import Path
+import sys
+import traceback
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+
+from Conversion import convertECGLeads, exportSignals
+import ImageCache
+import ImageUtilities
+from model.InputParameters import InputParameters
+from model.Lead import Lead, LeadId
+
+from . import image, manifest
+
+
+SUPPORTED_SUFFIXES = ['.png', '.jpg', '.jpeg', '.tif', '.tiff', '.pdf']
+SEPARATORS = {'comma': ',', 'tab': '\t', 'space': ' '}
+
+
+@dataclasses.dataclass(frozen=True)
+class PageResult:
+    stem: str  # Name of the page's outputs (see `image.DocumentPage.stem`)
+    csvPath: Optional[Path]  # None if digitization failed
+
+
+@dataclasses.dataclass(frozen=True)
+class FileResult:
+    path: Path
+    pages: List[PageResult]
+    error: Optional[str] = None  # Set if the file couldn't be digitized at all
+
+
+def loadInputParameters(presetPath: Path) -> InputParameters:
+    """Reads a preset or saved annotation (the JSON written by `Annotation.save`) into the pipeline's parameters."""
+    with open(presetPath) as file:
+        data = json.load(file)
+
+    leads = {
+        LeadId[name]: Lead(
+            x=lead['cropping']['x'],
+            y=lead['cropping']['y'],
+            width=lead['cropping']['width'],
+            height=lead['cropping']['height'],
+            startTime=lead['start'],
+        )
+        for name, lead in data['leads'].items()
+    }
+
+    return InputParameters(
+        rotation=data['rotation'],
+        timeScale=data['timeScale'],
+        voltScale=data['voltageScale'],
+        leads=leads,
+    )
+
+
+def findInputFiles(inputs: Iterable[Path]) -> List[Path]:
+    """Expands directories into the supported files they contain (not recursively), in sorted order."""
+    files = []
+
+    for inputPath in inputs:
+        if inputPath.is_dir():
+            files += sorted(path for path in inputPath.iterdir() if path.suffix.lower() in SUPPORTED_SUFFIXES)
+        elif inputPath.suffix.lower() in SUPPORTED_SUFFIXES:
+            files.append(inputPath)
+        else:
+            print(f"[Warning] Skipping unsupported file {inputPath}")
+
+    return files
+
+
+def digitizeFile(
+    path: Path,
+    parameters: InputParameters,
+    exportDirectory: Path,
+    previewDirectory: Optional[Path] = None,
+    separator: str = ',',
+    pdfDPI: int = ImageUtilities.DEFAULT_PDF_DPI,
+    pdfThreads: int = 1,
+) -> List[PageResult]:
+    """Digitizes every page of `path` (one at a time) and writes a CSV per page to `exportDirectory`, plus a preview of
+    each lead to `previewDirectory / <page>` if given. PDF pages are rasterized `pdfThreads` at a time in parallel (see
+    `image.openImagePages`).
+    """
+    results = []
+
+    for page in image.openImagePages(path, pdfDPI, pdfThreads):
+        signals, previews = convertECGLeads(page.image, parameters)
+
+        if signals is None:
+            print(f"[Error] Signal processing failed for {page.stem}")
+            results.append(PageResult(page.stem, None))
+            continue
+
+        csvPath = exportDirectory / f"{page.stem}.csv"
+        exportSignals(signals, csvPath, separator=separator)
+        print(f"Exported CSV to: {csvPath}")
+
+        if previewDirectory is not None:
+            pagePreviewDirectory = previewDirectory / page.stem
+            pagePreviewDirectory.mkdir(parents=True, exist_ok=True)
+            for leadId, preview in previews.items():
+                image.saveImage(preview, pagePreviewDirectory / f"{csvPath.name}_{leadId.name}.jpg")
+
+        results.append(PageResult(page.stem, csvPath))
+
+    return results
+
+
+def digitizeFiles(
+    files: List[Path],
+    parameters: InputParameters,
+    outputDirectory: Optional[Path] = None,
+    previews: bool = False,
+    separator: str = ',',
+    pdfDPI: int = ImageUtilities.DEFAULT_PDF_DPI,
+    workers: int = 1,
+    pdfThreads: int = 1,
+) -> Iterator[FileResult]:
+    """Digitizes each file (see `digitizeFile`), yielding their results in the order they finish.
+
+    With `workers > 1` the files are fanned out to a process pool. Only the paths and parameters are sent to the workers
+    (each decodes its own images), and an exception (or crash) while digitizing one file is reported in its result
+    instead of stopping the batch.
+
+    Args:
+        outputDirectory (Optional[Path], optional): Where to write `exported_leads` (and `image_previews`). Defaults to
+            None (next to each file).
+        pdfThreads (int, optional): Pages of each PDF to rasterize in parallel, on top of the `workers` files. Defaults
+            to 1.
+    """
+    jobs = [(path, parameters, outputDirectory, previews, separator, pdfDPI, pdfThreads) for path in files]
+
+    if workers <= 1:
+        for job in jobs:
+            yield _digitizeFileSafely(*job)
+        return
+
+    unfinished = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initializeWorker) as executor:
+        futures = {executor.submit(_digitizeFileSafely, *job): job for job in jobs}
+
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except BrokenProcessPool:
+                unfinished.append(futures[future])
+
+    # A worker died (e.g. a crash in native code), which fails every file that hadn't finished yet. Retry those one at a
+    # time, each in a fresh process, so only the file that actually crashes is lost.
+    for job in unfinished:
+        with ProcessPoolExecutor(max_workers=1, initializer=_initializeWorker) as executor:
+            try:
+                yield executor.submit(_digitizeFileSafely, *job).result()
+            except BrokenProcessPool:
+                yield FileResult(job[0], [], "The worker process crashed while digitizing this file")
+
+
+def _digitizeFileSafely(
+    path: Path,
+    parameters: InputParameters,
+    outputDirectory: Optional[Path],
+    previews: bool,
+    separator: str,
+    pdfDPI: int,
+    pdfThreads: int,
+) -> FileResult:
+    try:
+        if outputDirectory is None:
+            outputDirectory = path.parent
+
+        exportDirectory = outputDirectory / 'exported_leads'
+        exportDirectory.mkdir(parents=True, exist_ok=True)
+        previewDirectory = outputDirectory / 'image_previews' if previews else None
+
+        return FileResult(
+            path, digitizeFile(path, parameters, exportDirectory, previewDirectory, separator, pdfDPI, pdfThreads)
+        )
+    except Exception as exception:
+        traceback.print_exc()
+        return FileResult(path, [], f"{type(exception).__name__}: {exception}")
+
+
+def _initializeWorker() -> None:
+    # Each file is only decoded once, so caching decoded images would just hold on to memory in every worker
+    ImageCache.imageCache.byteBudget = 0
+    # The files are already processed in parallel; OpenCV's own threads would oversubscribe the cores
+    cv2.setNumThreads(1)
+
+
+def defaultManifestPath(inputs: List[Path], outputDirectory: Optional[Path]) -> Path:
+    """`.paperecg/batch-manifest.jsonl` in the output directory, or else the first input's directory."""
+    if outputDirectory is not None:
+        directory = outputDirectory
+    else:
+        directory = inputs[0] if inputs[0].is_dir() else inputs[0].parent
+
+    return directory / '.paperecg' / manifest.MANIFEST_FILENAME
+
+
+def recordResult(batchManifest: manifest.BatchManifest, result: FileResult, contentHash: str, settingsHash: str) -> bool:
+    """Records the file's outputs in the manifest, as done if every page was digitized. Returns whether it was."""
+    pageFailures = sum(page.csvPath is None for page in result.pages)
+    succeeded = result.error is None and pageFailures == 0
+
+    batchManifest.record(
+        result.path,
+        contentHash,
+        settingsHash,
+        manifest.Status.done if succeeded else manifest.Status.failed,
+        [page.csvPath for page in result.pages if page.csvPath is not None],
+        result.error if result.error is not None else (None if succeeded else f"{pageFailures} page(s) failed"),
+    )
+
+    return succeeded
+
+
+def hashFiles(
+    files: List[Path],
+    batchManifest: manifest.BatchManifest,
+    settingsHash: str,
+    force: bool = False,
+) -> Tuple[Dict[Path, str], List[Path], List[FileResult]]:
+    """Hashes the contents of each file, to check them against the manifest.
+
+    Returns:
+        Tuple[Dict[Path, str], List[Path], List[FileResult]]: The files to digitize with their content hashes, the files
+            already up to date in the manifest (unless `force`), and a failed result for each file that couldn't be
+            read, which is recorded in the manifest (without a content hash, so it is retried next time) like any
+            other failure instead of stopping the batch.
+    """
+    contentHashes = {}
+    upToDate = []
+    unreadable = []
+
+    for path in files:
+        try:
+            contentHash = manifest.fileDigest(path)
+        except OSError as exception:
+            result = FileResult(path, [], f"{type(exception).__name__}: {exception}")
+            recordResult(batchManifest, result, '', settingsHash)
+            unreadable.append(result)
+            continue
+
+        if not force and batchManifest.isUpToDate(path, contentHash, settingsHash):
+            upToDate.append(path)
+        else:
+            contentHashes[path] = contentHash
+
+    return contentHashes, upToDate, unreadable
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m ecgdigitize.batch",
+        description="Digitizes ECG images (and every page of PDFs) using the lead regions of a preset.",
+    )
+    parser.add_argument('inputs', nargs='+', type=Path, help="Images, PDFs or directories containing them")
+    parser.add_argument('--preset', required=True, type=Path, help="Preset or saved annotation JSON")
+    parser.add_argument('--output', type=Path, default=None,
+                        help="Directory to write `exported_leads` (and `image_previews`) to (default: next to each input)")
+    parser.add_argument('--previews', action='store_true', help="Also save an image of each extracted lead")
+    parser.add_argument('--delimiter', choices=SEPARATORS.keys(), default='comma')
+    parser.add_argument('--dpi', type=int, default=ImageUtilities.DEFAULT_PDF_DPI, help="Resolution to rasterize PDFs at")
+    parser.add_argument('--pdf-threads', type=int, default=1,
+                        help="Number of pages of each PDF to rasterize in parallel (each holds a page in memory)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of files to digitize in parallel (0 for one per CPU core)")
+    parser.add_argument('--manifest', type=Path, default=None,
+                        help=f"Manifest of digitized files (default: `.paperecg/{manifest.MANIFEST_FILENAME}` in the "
+                             "output directory, or else the first input's directory)")
+    parser.add_argument('--force', action='store_true', help="Digitize every file, even if it is up to date")
+    options = parser.parse_args(arguments)
+
+    parameters = loadInputParameters(options.preset)
+    if len(parameters.leads) == 0:
+        print("[Error] The preset has no leads to digitize")
+        return 1
+
+    separator = SEPARATORS[options.delimiter]
+    settingsHash = manifest.settingsDigest(parameters, separator=separator, pdfDPI=options.dpi, previews=options.previews)
+
+    manifestPath = options.manifest or defaultManifestPath(options.inputs, options.output)
+    batchManifest = manifest.BatchManifest(manifestPath)
+
+    contentHashes, upToDate, unreadable = hashFiles(
+        findInputFiles(options.inputs), batchManifest, settingsHash, options.force
+    )
+    files = list(contentHashes)
+
+    failures = 0
+    for result in unreadable:
+        print(f"[Error] {result.path}: {result.error}")
+        failures += 1
+
+    workers = options.workers if options.workers > 0 else (os.cpu_count() or 1)
+    print(f"Digitizing {len(files)} file(s) with {workers} worker(s) "
+          f"({len(upToDate)} already up to date in {manifestPath})")
+
+    for result in digitizeFiles(
+        files, parameters, options.output, options.previews, separator, options.dpi, workers, options.pdf_threads
+    ):
+        pageFailures = sum(page.csvPath is None for page in result.pages)
+
+        if result.error is not None:
+            print(f"[Error] {result.path}: {result.error}")
+            failures += 1
+        else:
+            print(f"Finished {result.path}")
+            failures += pageFailures
+
+        recordResult(batchManifest, result, contentHashes[result.path], settingsHash)
+
+    return 1 if failures > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
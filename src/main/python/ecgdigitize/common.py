@@ -89,7 +89,66 @@ def shiftedPairs(signal: Union[List, np.ndarray], limit: Optional[int] = None) -
 
 
 def autocorrelation(signal: np.ndarray, limit: int = None) -> np.ndarray:
-    return np.array([np.corrcoef(x, y)[0][1] for x, y in shiftedPairs(signal, limit)])
+    """The Pearson correlation between `signal` and itself shifted by each offset in `range(limit)` (see
+    `shiftedPairs`), i.e. `np.corrcoef(signal[:-offset], signal[offset:])` for every offset, computed with an FFT.
+    """
+    return autocorrelations([signal], limit)[0]
+
+
+def autocorrelations(signals: Sequence[np.ndarray], limit: int = None) -> 'List[np.ndarray]':
+    """Batched `autocorrelation` of several 1D signals (which may differ in length), sharing one FFT.
+
+    Offsets at which either shifted slice is constant are NaN, as with `np.corrcoef`.
+    """
+    lengths = np.array([len(signal) for signal in signals], dtype=int)
+    limits = lengths // 2 if limit is None else np.full(len(signals), limit)
+
+    if np.any(limits > lengths // 2):
+        raise ValueError("'limit' is greater than half the length of 'signal'")
+
+    if len(signals) == 0:
+        return []
+
+    # Pearson's r doesn't depend on the signal's offset, so centering first only reduces rounding errors
+    values = np.zeros((len(signals), lengths.max()), dtype=float)
+    for row, signal in enumerate(signals):
+        values[row, :len(signal)] = signal - np.mean(signal)
+
+    offsets = np.arange(limits.max())
+
+    # Σ x[i] * x[i + offset] for every offset, via the FFT (zero padded so the correlation doesn't wrap around)
+    fftLength = 1 << int(2 * values.shape[1] - 1).bit_length()
+    spectrum = np.fft.rfft(values, n=fftLength, axis=1)
+    products = np.fft.irfft(spectrum * np.conj(spectrum), n=fftLength, axis=1)[:, offsets]
+
+    # Sums (of squares) of the leading slice `x[:n-offset]` and the trailing slice `x[offset:]`, from prefix sums
+    prefixSums = np.pad(np.cumsum(values, axis=1), ((0, 0), (1, 0)))
+    prefixSquares = np.pad(np.cumsum(values**2, axis=1), ((0, 0), (1, 0)))
+
+    ends = np.clip(lengths[:, np.newaxis] - offsets, 0, None)
+    totals = np.take_along_axis(prefixSums, lengths[:, np.newaxis], axis=1)
+    totalSquares = np.take_along_axis(prefixSquares, lengths[:, np.newaxis], axis=1)
+
+    leadingSums = np.take_along_axis(prefixSums, ends, axis=1)
+    leadingSquares = np.take_along_axis(prefixSquares, ends, axis=1)
+    trailingSums = totals - prefixSums[:, offsets]
+    trailingSquares = totalSquares - prefixSquares[:, offsets]
+
+    counts = ends.astype(float)
+    covariances = counts * products - leadingSums * trailingSums
+    leadingVariances = counts * leadingSquares - leadingSums**2
+    trailingVariances = counts * trailingSquares - trailingSums**2
+
+    # A constant slice only has a variance of zero up to rounding errors
+    tolerance = 1e-10
+    constant = (leadingVariances <= tolerance * counts * leadingSquares) | \
+        (trailingVariances <= tolerance * counts * trailingSquares)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlations = covariances / np.sqrt(leadingVariances * trailingVariances)
+    correlations = np.where(constant, np.nan, np.clip(correlations, -1, 1))
+
+    return [correlations[row, :rowLimit] for row, rowLimit in enumerate(limits)]
 
 
 def zipDict(dictionary: Dict) -> Iterable[Tuple[Any, Any]]:
@@ -1,4 +1,5 @@
-from typing import Optional, Union
+import time
+from typing import Dict, List, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
 
@@ -9,7 +10,7 @@ from . import common
 from .grid import detection as grid_detection
 from .grid import extraction as grid_extraction
 from .signal import detection as signal_detection
-from .signal.extraction import viterbi
+from .signal.extraction import pyramid, vectorized, viterbi
 from . import vision
 
 
@@ -40,22 +41,39 @@ class SignalDetectionMethod(Enum):
 
 class SignalExtractionMethod(Enum):
     default = 'default'
+    vectorized = 'vectorized'
+    beam = 'beam'
+    pyramid = 'pyramid'
 
 
 def digitizeSignal(
     image: ColorImage,
     detectionMethod: SignalDetectionMethod = SignalDetectionMethod.default,
-    extractionMethod: SignalExtractionMethod = SignalExtractionMethod.default
+    extractionMethod: SignalExtractionMethod = SignalExtractionMethod.default,
+    beamWidth: int = vectorized.DEFAULT_BEAM_WIDTH,  # Only used by `SignalExtractionMethod.beam`
+    timings: Optional[Dict[str, float]] = None  # If given, filled with the seconds spent in each stage
 ) -> Union[np.ndarray, common.Failure]:
+    start = time.perf_counter()
+
     # First, convert color image to binary image where signal pixels are turned on (1) and other are off (0)
     if detectionMethod == SignalDetectionMethod.default:
         binary = signal_detection.adaptive(image)
     else:
         raise ValueError("Unrecognized SignalDetectionMethod in `digitizeSignal`")
 
+    if timings is not None:
+        timings["detection"] = time.perf_counter() - start
+
     # Second, analyze the binary image to produce a signal
     if extractionMethod == SignalExtractionMethod.default:
         signal = viterbi.extractSignal(binary)
+    elif extractionMethod == SignalExtractionMethod.vectorized:
+        signal = vectorized.extractSignal(binary)
+    elif extractionMethod == SignalExtractionMethod.beam:
+        signal = vectorized.extractSignal(binary, beamWidth=beamWidth)
+    elif extractionMethod == SignalExtractionMethod.pyramid:
+        # Coarse-to-fine; records the time spent on each level in `timings`
+        signal = pyramid.extractSignal(binary, timings=timings)
     else:
         raise ValueError("Unrecognized SignalExtractionMethod in `digitizeSignal`")
 
@@ -90,3 +108,52 @@ def digitizeGrid(
 
     return gridPeriod
 
+
+def digitizeRegionsGrid(
+    regionImages: List[ColorImage],
+    maximumDisagreement: float = 0.05,
+    regionSpacings: Optional[List[Optional[float]]] = None,
+) -> Union[float, common.Failure]:  # Returns size of grid in pixels
+    """Estimates the grid size once for a whole page, instead of once per lead, from the (already rotated) crops of its
+    regions (e.g. the leads), so text and margins stay out of the estimate and the rest of the page never has to be
+    rotated. The regions' autocorrelations are averaged (see `grid_extraction.estimateFrequenciesViaAutocorrelations`),
+    so a slight skew of the page doesn't blur the grid.
+
+    Args:
+        regionImages (List[ColorImage]): The crops of the regions, rotated so the grid is axis aligned.
+        maximumDisagreement (float, optional): The grid is square, so the estimate is only trusted if the row and column
+            periods are within this fraction of each other. Defaults to 0.05.
+        regionSpacings (Optional[List[Optional[float]]], optional): If given, filled with each region's own estimate
+            of the grid size (None where there is none), e.g. to check the regions against the page's. These come out
+            of the same pass as the page's, so cost almost nothing extra.
+
+    Returns:
+        Union[float, common.Failure]: The grid size in pixels, or a Failure if the estimate is unreliable (in which
+            case each lead should be estimated with `digitizeGrid` instead).
+    """
+    if regionSpacings is not None:
+        regionSpacings[:] = [None] * len(regionImages)
+
+    if len(regionImages) == 0:
+        return common.Failure("No regions to estimate the grid from.")
+
+    grayscaleImages = [regionImage.toGrayscale() for regionImage in regionImages]
+
+    # Same as `grid_detection.allDarkPixels`, but with the white point taken over all the regions rather than per lead
+    whitePoint = int(np.argmax(sum(grayscaleImage.histogram() for grayscaleImage in grayscaleImages)))
+    binaryImages = [
+        grayscaleImage.whitePointAdjusted(whitePoint=whitePoint).toBinary(230).data
+        for grayscaleImage in grayscaleImages
+    ]
+
+    columnPeriod, rowPeriod = grid_extraction.estimateFrequenciesViaAutocorrelations(binaryImages, regionSpacings)
+
+    if columnPeriod is None or rowPeriod is None:
+        return common.Failure("Unable to estimate the frequency of the page's grid in both directions.")
+
+    if abs(columnPeriod - rowPeriod) > maximumDisagreement * min(columnPeriod, rowPeriod):
+        return common.Failure(
+            f"The page's grid periods disagree (columns: {columnPeriod:.2f}px, rows: {rowPeriod:.2f}px)."
+        )
+
+    return columnPeriod
@@ -4,7 +4,8 @@ Created February 17, 2021
 
 Provides methods for extracting grid data from images of leads.
 """
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
+import warnings
 
 import numpy as np
 
@@ -44,23 +45,7 @@ def traceGridlines(binaryImage: BinaryImage, houghThreshold: int = 80) -> Option
 def estimateFrequencyViaAutocorrelation(binaryImage: np.ndarray) -> Union[float, common.Failure]:
     # TODO: Assert image is binary. Make typealias for Binary to help?
 
-    columnDensity = np.sum(binaryImage, axis=0)
-    rowDensity = np.sum(binaryImage, axis=1)
-
-    columnFrequencyStrengths = common.autocorrelation(columnDensity)
-    rowFrequencyStrengths = common.autocorrelation(rowDensity)
-
-    # <-- DEBUG -->
-    # from .. import visualization
-    # import matplotlib.pyplot as plt
-    # plt.plot(columnDensity)
-    # visualization.displayGreyscaleImage(binaryImage)
-    # plt.plot(columnFrequencyStrengths)
-    # plt.plot(rowFrequencyStrengths)
-    # plt.show()
-
-    columnFrequency = grid_frequency._estimateFirstPeakLocation(columnFrequencyStrengths)
-    rowFrequency = grid_frequency._estimateFirstPeakLocation(rowFrequencyStrengths)
+    columnFrequency, rowFrequency = estimateFrequenciesViaAutocorrelation(binaryImage)
 
     if columnFrequency and rowFrequency:
         # TODO: Make this configurable or remove:
@@ -74,3 +59,74 @@ def estimateFrequencyViaAutocorrelation(binaryImage: np.ndarray) -> Union[float,
     else:
         return common.Failure("Unable to estimate the frequency of the grid in either directions.")
 
+
+def estimateFrequenciesViaAutocorrelation(binaryImage: np.ndarray) -> Tuple[Optional[float], Optional[float]]:
+    """Estimates the period of the grid along each axis.
+
+    Returns:
+        Tuple[Optional[float], Optional[float]]: The `(column, row)` periods, each None if no peak was found.
+    """
+    return estimateFrequenciesViaAutocorrelations([binaryImage])
+
+
+def estimateFrequenciesViaAutocorrelations(
+    binaryImages: List[np.ndarray],
+    imagePeriods: Optional[List[Optional[float]]] = None,
+) -> Tuple[Optional[float], Optional[float]]:
+    """Estimates the period of a grid shared by several images (e.g. every lead of a page) along each axis, from the
+    average of their autocorrelations. Each image's densities are only summed over its own rows/columns, so a slight
+    skew over the whole page doesn't blur the grid like summing over the whole page would.
+
+    Args:
+        imagePeriods (Optional[List[Optional[float]]], optional): If given, filled with each image's own period, from
+            its own autocorrelations (the column period if found, like `estimateFrequencyViaAutocorrelation`, else the
+            row period, else None).
+
+    Returns:
+        Tuple[Optional[float], Optional[float]]: The `(column, row)` periods, each None if no peak was found.
+    """
+    if imagePeriods is not None:
+        imagePeriods[:] = [None] * len(binaryImages)
+
+    usable = [index for index, binaryImage in enumerate(binaryImages) if min(binaryImage.shape) >= 2]
+    binaryImages = [binaryImages[index] for index in usable]
+    if len(binaryImages) == 0:
+        return None, None
+
+    columnDensities = [np.sum(binaryImage, axis=0) for binaryImage in binaryImages]
+    rowDensities = [np.sum(binaryImage, axis=1) for binaryImage in binaryImages]
+
+    # Only the offsets every image has can be averaged
+    columnLimit = min(len(density) for density in columnDensities) // 2
+    rowLimit = min(len(density) for density in rowDensities) // 2
+
+    columnAutocorrelations = common.autocorrelations(columnDensities, columnLimit)
+    rowAutocorrelations = common.autocorrelations(rowDensities, rowLimit)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)  # All-NaN offsets (every image constant there)
+        columnFrequencyStrengths = np.nanmean(columnAutocorrelations, axis=0)
+        rowFrequencyStrengths = np.nanmean(rowAutocorrelations, axis=0)
+
+    # <-- DEBUG -->
+    # from .. import visualization
+    # import matplotlib.pyplot as plt
+    # plt.plot(columnDensities[0])
+    # visualization.displayGreyscaleImage(binaryImages[0])
+    # plt.plot(columnFrequencyStrengths)
+    # plt.plot(rowFrequencyStrengths)
+    # plt.show()
+
+    # The images' own peaks (if asked for) are found in the same batch as the average's
+    curves = [columnFrequencyStrengths, rowFrequencyStrengths]
+    if imagePeriods is not None:
+        curves += [*columnAutocorrelations, *rowAutocorrelations]
+
+    columnFrequency, rowFrequency, *periods = grid_frequency._estimateFirstPeakLocations(curves)
+
+    if imagePeriods is not None:
+        count = len(binaryImages)
+        for index, columnPeriod, rowPeriod in zip(usable, periods[:count], periods[count:]):
+            imagePeriods[index] = columnPeriod or rowPeriod
+
+    return columnFrequency, rowFrequency
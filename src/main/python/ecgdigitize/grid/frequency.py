@@ -1,4 +1,5 @@
-from typing import List, Optional, Union
+from enum import Enum
+from typing import List, Optional, Sequence, Union
 
 import numpy as np
 import scipy.signal
@@ -12,11 +13,18 @@ def _findFirstPeak(signal: np.ndarray, minHeight: float = 0.3, prominence: float
     else:
         return peaks[0]
 
+class PeakInterpolation(Enum):
+    parabolic = 'parabolic'  # Parabola through the peak and its two neighbors
+    gaussian = 'gaussian'    # Same, through the log of the samples (i.e. a Gaussian); needs positive samples
+    spline = 'spline'        # Quadratic spline evaluated on a fine grid (slow, kept for reference)
+
+
 def _estimateFirstPeakLocation(
     signal: np.ndarray,
     interpolate: bool = True,
     interpolationRadius: int = 2,
-    interpolationGranularity: float = 0.01
+    interpolationGranularity: float = 0.01,
+    interpolation: PeakInterpolation = PeakInterpolation.parabolic,
 ) -> Optional[float]:
     assert interpolationRadius >= 1
 
@@ -26,20 +34,83 @@ def _estimateFirstPeakLocation(
 
     if interpolate:
         # Squeeze out a little more accuracy by fitting a quadratic to the points around the peak then finding the maximum
-        start, end = index - interpolationRadius, index + interpolationRadius
-        func = scipy.interpolate.interp1d(range(start, end + 1), signal[start:end + 1], kind='quadratic')
-        newX = np.arange(start, end, interpolationGranularity)
-        newY = func(newX)
+        if interpolation == PeakInterpolation.spline:
+            return _splinePeak(signal, index, interpolationRadius, interpolationGranularity)
+        else:
+            return float(_refinePeaks([signal], [index], interpolationRadius, interpolation)[0])
+
+    else:
+        return index
+
 
-        newPeak = newX[np.argmax(newY)]
+def _estimateFirstPeakLocations(
+    signals: Sequence[np.ndarray],
+    interpolationRadius: int = 2,
+    interpolation: PeakInterpolation = PeakInterpolation.parabolic,
+) -> List[Optional[float]]:
+    """Batched `_estimateFirstPeakLocation` (with interpolation) for several curves, e.g. the row and column
+    autocorrelations of every lead."""
+    assert interpolationRadius >= 1
+    assert interpolation != PeakInterpolation.spline
 
-        # <-- DEBUG -->
-        # import matplotlib.pyplot as plt
-        # plt.plot(range(start, end + 1), signal[start:end + 1])
-        # plt.plot(newX, newY)
-        # plt.show()
+    indices = [_findFirstPeak(signal) for signal in signals]
+    found = [i for i, index in enumerate(indices) if index is not None]
 
-        return newPeak
+    locations: List[Optional[float]] = [None] * len(signals)
+    refined = _refinePeaks([signals[i] for i in found], [indices[i] for i in found], interpolationRadius, interpolation)
+    for i, location in zip(found, refined):
+        locations[i] = float(location)
 
-    else:
-        return index
\ No newline at end of file
+    return locations
+
+
+def _refinePeaks(
+    signals: Sequence[np.ndarray],
+    indices: Sequence[int],
+    radius: int,
+    interpolation: PeakInterpolation = PeakInterpolation.parabolic,
+) -> np.ndarray:
+    """Sub-sample location of each peak, from the vertex of the parabola through the peak's sample and its two
+    neighbors (for `PeakInterpolation.gaussian`, through their logs). Like the spline's, the refinement only considers
+    peaks at least `radius` samples from the edge of their signal; those closer, or whose samples aren't concave, are
+    returned unchanged.
+    """
+    indices = np.asarray(indices, dtype=int)
+
+    windows = np.zeros((len(indices), 3))
+    valid = np.zeros(len(indices), dtype=bool)
+    for row, (signal, index) in enumerate(zip(signals, indices)):
+        if index - radius >= 0 and index + radius < len(signal):
+            windows[row] = signal[index - 1:index + 2]
+            valid[row] = True
+
+    if interpolation == PeakInterpolation.gaussian:
+        valid &= np.all(windows > 0, axis=1)
+        windows = np.log(np.where(windows > 0, windows, 1))
+    elif interpolation != PeakInterpolation.parabolic:
+        raise ValueError("Unrecognized interpolation in `_refinePeaks`")
+
+    before, peak, after = windows[:, 0], windows[:, 1], windows[:, 2]
+    curvature = before - 2 * peak + after
+
+    concave = valid & (curvature < 0)
+    vertices = np.clip(.5 * (before - after) / np.where(concave, curvature, -1), -1, 1)
+
+    return np.where(concave, indices + vertices, indices)
+
+
+def _splinePeak(signal: np.ndarray, index: int, interpolationRadius: int, interpolationGranularity: float) -> float:
+    start, end = index - interpolationRadius, index + interpolationRadius
+    func = scipy.interpolate.interp1d(range(start, end + 1), signal[start:end + 1], kind='quadratic')
+    newX = np.arange(start, end, interpolationGranularity)
+    newY = func(newX)
+
+    newPeak = newX[np.argmax(newY)]
+
+    # <-- DEBUG -->
+    # import matplotlib.pyplot as plt
+    # plt.plot(range(start, end + 1), signal[start:end + 1])
+    # plt.plot(newX, newY)
+    # plt.show()
+
+    return newPeak
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Optional, Tuple, Union
+from typing import Iterator, Optional, Tuple, Union
 import dataclasses
 
 import cv2
@@ -70,13 +70,19 @@ class GrayscaleImage(Image):
         assert self.data.dtype is np.dtype('uint8')
         return GrayscaleImage(self.data / 255)
 
-    def whitePointAdjusted(self, strength: float = 1.0):  # -> GrayscaleImage:
-        hist = self.histogram()
-        whitePoint = np.argmax(hist)
+    def whitePointAdjusted(self, strength: float = 1.0, whitePoint: Optional[int] = None):  # -> GrayscaleImage:
+        if whitePoint is None:
+            hist = self.histogram()
+            whitePoint = np.argmax(hist)
         whiteScaleFactor = 255 / whitePoint * strength
         return GrayscaleImage(cv2.addWeighted(self.data, whiteScaleFactor, self.data, 0, 0))
 
     def histogram(self) -> np.ndarray:
+        if self.data.dtype == np.uint8:
+            # Same bins as below (255 bins, where the last bin holds both 254 and 255), but much faster
+            counts = np.bincount(self.data.ravel(), minlength=256)
+            return np.concatenate((counts[:254], [counts[254] + counts[255]]))
+
         counts, _ = np.histogram(self.data, 255, range=(0,255))
         return counts
 
@@ -99,16 +105,58 @@ class BinaryImage(Image):
 #########################
 
 
-def openImage(path: Path) -> ColorImage:
+def openImage(path: Path, pdfPage: int = 1, pdfDPI: int = imgU.DEFAULT_PDF_DPI) -> ColorImage:
     assert isinstance(path, Path)
     assert path.exists()
 
-    data = imgU.readImage(path) #cv2.imread(str(path))
+    data = imgU.readImage(path, pdfPage, pdfDPI) #cv2.imread(str(path))
     assert data is not None
 
     return ColorImage(data)
 
 
+@dataclasses.dataclass(frozen=True)
+class DocumentPage:
+    path: Path
+    number: int  # 1-indexed
+    pageCount: int
+    image: ColorImage
+
+    @property
+    def stem(self) -> str:
+        """Name for the outputs of this page: the file's stem, plus the (zero padded) page number if it has several."""
+        if self.pageCount == 1:
+            return self.path.stem
+        else:
+            return f"{self.path.stem}-page{self.number:0{len(str(self.pageCount))}d}"
+
+
+def openImagePages(
+    path: Path,
+    pdfDPI: int = imgU.DEFAULT_PDF_DPI,
+    pdfThreads: int = 1,
+) -> Iterator[DocumentPage]:
+    """Yields every page of a PDF, rasterizing them `pdfThreads` at a time in parallel (so only that many pages are held
+    in memory), or the image itself for other formats.
+
+    PDF pages bypass the decoded image cache, since a long document would just evict everything else from it.
+    """
+    assert isinstance(path, Path)
+    assert path.exists()
+
+    if path.suffix.lower() != '.pdf':
+        yield DocumentPage(path, 1, 1, openImage(path))
+        return
+
+    pageCount = imgU.pdfPageCount(path)
+    chunkSize = max(pdfThreads, 1)
+    for firstPage in range(1, pageCount + 1, chunkSize):
+        lastPage = min(firstPage + chunkSize - 1, pageCount)
+        pages = imgU.rasterizePdf(path, firstPage=firstPage, lastPage=lastPage, dpi=pdfDPI, threadCount=pdfThreads)
+        for number, data in enumerate(pages, start=firstPage):
+            yield DocumentPage(path, number, pageCount, ColorImage(data))
+
+
 def saveImage(image: Image, path: Path) -> None:
     assert isinstance(image, (ColorImage, GrayscaleImage, BinaryImage))
 
@@ -150,13 +198,19 @@ class Boundaries:
     toY: int
 
 
-def cropped(inputImage: Image, crop: Union[Rectangle, Boundaries]) -> Image:
+def cropped(inputImage: Image, crop: Union[Rectangle, Boundaries], contiguous: bool = False) -> Image:
+    """Crops the image without copying it: the result is a view of `inputImage`'s data, so it must not be modified in
+    place. Pass `contiguous=True` to get a (C-contiguous) copy of only the cropped region instead, e.g. for APIs that
+    need their own buffer.
+    """
     if isinstance(crop, Rectangle):
         x, y, w, h = crop.x, crop.y, crop.width, crop.height
         crop = Boundaries(x, x+w, y, y+h)
 
-    outputData = inputImage.data.copy()
-    croppedData = outputData[crop.fromY:crop.toY, crop.fromX:crop.toX]
+    croppedData = inputImage.data[crop.fromY:crop.toY, crop.fromX:crop.toX]
+
+    if contiguous:
+        croppedData = croppedData.copy()
 
     if isinstance(inputImage, ColorImage):
         return ColorImage(croppedData)
@@ -169,8 +223,7 @@ def cropped(inputImage: Image, crop: Union[Rectangle, Boundaries]) -> Image:
 
 
 def rotated(inputImage: Image, angle: float, border: Tuple[int, int, int] = (255,255,255)) -> Image:
-    center = (inputImage.width // 2, inputImage.height // 2)
-    rotationMatrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+    rotationMatrix = _rotationMatrix(inputImage, angle)
     rotatedData = cv2.warpAffine(
         inputImage.data,
         rotationMatrix,
@@ -180,11 +233,78 @@ def rotated(inputImage: Image, angle: float, border: Tuple[int, int, int] = (255
         borderValue=border,
     )
 
+    return _sameType(inputImage, rotatedData)
+
+
+def rotatedAndCropped(
+    inputImage: Image,
+    angle: float,
+    crop: Union[Rectangle, Boundaries],
+    border: Tuple[int, int, int] = (255,255,255),
+) -> Image:
+    """Same as `cropped(rotated(inputImage, angle, border), crop)`, but only warps the patch of the page that `crop`
+    maps back to, so the cost scales with the crop's area instead of the page's.
+
+    The result can differ from rotating the whole page by a few levels along sharp edges, as `cv2.warpAffine` rounds
+    its coordinates (to 1/32 of a pixel) relative to the patch rather than the page.
+    """
+    if isinstance(crop, Rectangle):
+        x, y, w, h = crop.x, crop.y, crop.width, crop.height
+        crop = Boundaries(x, x+w, y, y+h)
+
+    # Resolve the bounds the same way slicing does in `cropped`
+    fromX, toX, _ = slice(crop.fromX, crop.toX).indices(inputImage.width)
+    fromY, toY, _ = slice(crop.fromY, crop.toY).indices(inputImage.height)
+    toX, toY = max(toX, fromX), max(toY, fromY)
+
+    if toX == fromX or toY == fromY:
+        return _sameType(inputImage, inputImage.data[fromY:toY, fromX:toX].copy())
+
+    rotationMatrix = _rotationMatrix(inputImage, angle)
+
+    # The bounding box of where the crop's corners come from, padded by the reach of the cubic kernel (and a pixel of
+    # rounding), so the patch holds every pixel the crop is interpolated from. Past the edges of the page, the border is
+    # filled in just like when rotating the whole page.
+    corners = np.array([[fromX, fromY], [toX - 1, fromY], [fromX, toY - 1], [toX - 1, toY - 1]], dtype=float)
+    sources = cv2.transform(corners[np.newaxis], cv2.invertAffineTransform(rotationMatrix))[0]
+    padding = 3  # The cubic kernel reaches two pixels away
+    patchFromX, patchFromY = np.floor(sources.min(axis=0)).astype(int) - padding
+    patchToX, patchToY = np.ceil(sources.max(axis=0)).astype(int) + padding + 1
+
+    # Clipped to the page, but kept at least a pixel wide: a crop that only comes from outside of the page (at least the
+    # padding away from it) is all border either way
+    patchFromX = int(np.clip(patchFromX, 0, inputImage.width - 1))
+    patchFromY = int(np.clip(patchFromY, 0, inputImage.height - 1))
+    patchToX = int(np.clip(patchToX, patchFromX + 1, inputImage.width))
+    patchToY = int(np.clip(patchToY, patchFromY + 1, inputImage.height))
+
+    # The same rotation, from the patch's coordinates to the crop's
+    patchMatrix = rotationMatrix.copy()
+    patchMatrix[:, 2] += rotationMatrix[:, :2] @ (patchFromX, patchFromY) - (fromX, fromY)
+
+    rotatedData = cv2.warpAffine(
+        inputImage.data[patchFromY:patchToY, patchFromX:patchToX],
+        patchMatrix,
+        (toX - fromX, toY - fromY),
+        flags=cv2.INTER_CUBIC,
+        borderMode=cv2.BORDER_CONSTANT,
+        borderValue=border,
+    )
+
+    return _sameType(inputImage, rotatedData)
+
+
+def _rotationMatrix(inputImage: Image, angle: float) -> np.ndarray:
+    center = (inputImage.width // 2, inputImage.height // 2)
+    return cv2.getRotationMatrix2D(center, angle, 1.0)
+
+
+def _sameType(inputImage: Image, data: np.ndarray) -> Image:
     if isinstance(inputImage, ColorImage):
-        return ColorImage(rotatedData)
+        return ColorImage(data)
     elif isinstance(inputImage, GrayscaleImage):
-        return GrayscaleImage(rotatedData)
+        return GrayscaleImage(data)
     elif isinstance(inputImage, BinaryImage):
-        return BinaryImage(rotatedData)
+        return BinaryImage(data)
     else:
         raise ValueError
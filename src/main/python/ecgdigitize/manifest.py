@@ -0,0 +1,146 @@
+"""
+manifest.py
+Created October 18, 2026
+
+Append-only record (JSON lines) of the files a batch has digitized, so that rerunning the batch skips files whose
+contents and settings haven't changed since they were last digitized, and a crashed run resumes with the files it
+hadn't finished.
+"""
+import dataclasses
+import datetime
+from enum import Enum
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from model.InputParameters import InputParameters
+
+
+# Bump whenever a change to the pipeline changes its output, so files digitized by older versions are redone
+PIPELINE_VERSION = 1
+
+MANIFEST_FILENAME = 'batch-manifest.jsonl'
+
+
+class Status(Enum):
+    done = 'done'
+    failed = 'failed'
+
+
+@dataclasses.dataclass(frozen=True)
+class ManifestRecord:
+    path: str  # Absolute
+    contentHash: str
+    settingsHash: str
+    version: int
+    status: Status
+    outputs: List[str]
+    timeStamp: str
+    error: Optional[str] = None
+
+    def toDict(self) -> Dict[str, Any]:
+        dictionary = dataclasses.asdict(self)
+        dictionary['status'] = self.status.value
+        return dictionary
+
+    @classmethod
+    def fromDict(cls, dictionary: Dict[str, Any]):  # -> ManifestRecord
+        return cls(**{**dictionary, 'status': Status(dictionary['status'])})
+
+
+def fileDigest(path: Path) -> str:
+    """SHA-256 of the file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settingsDigest(parameters: InputParameters, **options: Any) -> str:
+    """SHA-256 of the parameters and any other options that affect the outputs (e.g. the CSV separator)."""
+    settings = {
+        'rotation': parameters.rotation,
+        'timeScale': parameters.timeScale,
+        'voltScale': parameters.voltScale,
+        'leads': {leadId.name: dataclasses.asdict(lead) for leadId, lead in parameters.leads.items()},
+        'options': options,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+class BatchManifest:
+    """The latest record of each file, loaded from (and appended to) the manifest at `path`.
+
+    Records are written as soon as each file finishes (and flushed to disk), so a crash loses at most the files that
+    were still being digitized.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.records: Dict[str, ManifestRecord] = {}
+
+        if path.exists():
+            with open(path) as file:
+                for lineNumber, line in enumerate(file, start=1):
+                    if line.strip() == '':
+                        continue
+                    try:
+                        record = ManifestRecord.fromDict(json.loads(line))
+                    except (ValueError, TypeError, KeyError):
+                        # Most likely the last line of a run that was killed mid-write
+                        print(f"Warning: Ignoring unreadable line {lineNumber} of {path}")
+                        continue
+                    self.records[record.path] = record
+
+    def isUpToDate(self, path: Path, contentHash: str, settingsHash: str) -> bool:
+        """Whether `path` was already digitized successfully, from the same contents, with the same settings and pipeline
+        version, and its outputs still exist.
+        """
+        record = self.records.get(str(path.absolute()))
+
+        return (
+            record is not None
+            and record.status is Status.done
+            and record.contentHash == contentHash
+            and record.settingsHash == settingsHash
+            and record.version == PIPELINE_VERSION
+            and all(Path(output).exists() for output in record.outputs)
+        )
+
+    def record(
+        self,
+        path: Path,
+        contentHash: str,
+        settingsHash: str,
+        status: Status,
+        outputs: List[Path],
+        error: Optional[str] = None,
+    ) -> ManifestRecord:
+        record = ManifestRecord(
+            path=str(path.absolute()),
+            contentHash=contentHash,
+            settingsHash=settingsHash,
+            version=PIPELINE_VERSION,
+            status=status,
+            outputs=[str(output.absolute()) for output in outputs],
+            timeStamp=datetime.datetime.now().isoformat(timespec='seconds'),
+            error=error,
+        )
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a+') as file:
+            # Start a new line if the last write was cut off, so this record isn't lost with it
+            file.seek(0, os.SEEK_END)
+            if file.tell() > 0:
+                file.seek(file.tell() - 1)
+                if file.read(1) != '\n':
+                    file.write('\n')
+            file.write(json.dumps(record.toDict()) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+        self.records[record.path] = record
+        return record
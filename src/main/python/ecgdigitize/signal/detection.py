@@ -8,7 +8,7 @@ import cv2
 import numpy as np
 
 from .. import common, otsu, vision
-from ..image import BinaryImage, ColorImage
+from ..image import BinaryImage, ColorImage, GrayscaleImage
 from ..grid import frequency as grid_frequency
 
 
@@ -57,6 +57,10 @@ def _denoise(image: BinaryImage, kernelSize: int = 3, erosions: int = 1, dilatio
 
 def _gridIsDetectable(image: BinaryImage) -> bool:
     columnDensity = np.sum(image.data, axis=0)
+    return _gridIsDetectableFromDensity(columnDensity)
+
+
+def _gridIsDetectableFromDensity(columnDensity: np.ndarray) -> bool:
     columnFrequencyStrengths = common.autocorrelation(columnDensity)
     columnFrequency = grid_frequency._estimateFirstPeakLocation(
         columnFrequencyStrengths,
@@ -66,25 +70,63 @@ def _gridIsDetectable(image: BinaryImage) -> bool:
     return not columnFrequency is None
 
 
+def _cumulativeColumnHistograms(image: GrayscaleImage) -> np.ndarray:
+    """For each column, the number of pixels at or below each intensity (shape `(width, 256)`), in one pass."""
+    assert image.data.dtype == np.uint8
+
+    height, width = image.data.shape
+    keys = np.arange(width, dtype=np.int64)[np.newaxis, :] * 256 + image.data
+    histograms = np.bincount(keys.ravel(), minlength=width * 256).reshape(width, 256)
+
+    return np.cumsum(histograms, axis=1)
+
+
+def _imageHistogram(cumulativeHistograms: np.ndarray) -> np.ndarray:
+    """The histogram of the whole image, binned like `GrayscaleImage.histogram` (254 and 255 share the last bin)."""
+    counts = np.diff(cumulativeHistograms.sum(axis=0), prepend=0)
+
+    return np.concatenate((counts[:254], [counts[254] + counts[255]]))
+
+
+def _columnDensityAt(cumulativeHistograms: np.ndarray, threshold: float) -> np.ndarray:
+    """The column density of `toBinary(threshold)` (cv2 keeps the pixels at or below the floor of the threshold)."""
+    level = int(np.floor(threshold))
+
+    if level < 0:
+        return np.zeros(len(cumulativeHistograms), dtype=cumulativeHistograms.dtype)
+
+    return cumulativeHistograms[:, min(level, 255)]
+
+
 def adaptive(image: ColorImage, applyDenoising: bool = False) -> BinaryImage:
     maxHedge = 1
     minHedge = 0.6  # 0.5
 
     grayscaleImage = image.toGrayscale()
-    otsuThreshold = otsu.otsuThreshold(grayscaleImage)
+    cumulativeHistograms = _cumulativeColumnHistograms(grayscaleImage)
+    otsuThreshold = otsu.otsuThreshold(grayscaleImage, _imageHistogram(cumulativeHistograms))
+
+    # The hedges a linear walk would try (accumulated the same way, so the thresholds are identical)
+    hedges = [float(maxHedge)]
+    while hedges[-1] - 0.05 >= minHedge:  # TODO: More intelligent choice of step
+        hedges.append(hedges[-1] - 0.05)
 
-    hedging = float(maxHedge)
-    binary = grayscaleImage.toBinary(otsuThreshold * hedging)
+    # Lowering the threshold only removes pixels, so once the grid can't be detected it stays that way. Bisect for the
+    # first hedge at which the grid disappears (or the lowest hedge if it never does), looking the column densities up
+    # in the cumulative histograms instead of re-thresholding the image each time.
+    low, high = 0, len(hedges) - 1
+    while low < high:
+        middle = (low + high) // 2
+        columnDensity = _columnDensityAt(cumulativeHistograms, otsuThreshold * hedges[middle])
 
-    while _gridIsDetectable(binary):
-        hedging -= 0.05  # TODO: More intelligent choice of step
-        if hedging < minHedge:
-            break
+        if _gridIsDetectableFromDensity(columnDensity):
+            low = middle + 1
+        else:
+            high = middle
 
-        binary = grayscaleImage.toBinary(otsuThreshold * hedging)
+    binary = grayscaleImage.toBinary(otsuThreshold * hedges[low])
 
     if applyDenoising:
         return _denoise(binary)
     else:
         return binary
-
@@ -0,0 +1,260 @@
+"""
+pyramid.py
+Created October 18, 2026
+
+Coarse-to-fine signal extraction: the paths that could be the trace are first found on a downsampled copy of the
+binary image, then the full resolution search only considers the points inside a corridor around them. This only pays
+off where the corridor leaves out most of the candidate points (speckle noise or remnants of the grid around the
+trace); on sparse images, and where most of the points could be on the trace, the full search is run directly.
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ... import common
+from ...image import BinaryImage
+from . import vectorized, viterbi
+
+
+DEFAULT_FACTOR = 4
+DEFAULT_CORRIDOR_RADIUS = 4  # In full resolution pixels
+
+# Below this many runs per column (a clean scan has about two), the corridor can't leave out enough of them to pay for
+# the coarse level, so the full search is run directly
+DEFAULT_MINIMUM_DENSITY = 4
+
+# Coarse paths scoring within this fraction of the best one are kept in the corridor too (see `nearOptimalRuns`)
+DEFAULT_SCORE_MARGIN = .25
+
+# Above this fraction of the runs in the corridor, searching it costs about as much as the full search
+DEFAULT_MAXIMUM_CORRIDOR_FRACTION = .6
+
+# How many times the corridor may be widened where the full resolution path leaves it, before the full search is run
+# instead, and by how many coarse columns on either side of each exit
+DEFAULT_MAXIMUM_WIDENINGS = 4
+WIDENING_RADIUS = 2
+
+# How many blank rows may separate a run outside of the corridor from the path for the path to be considered to leave
+# the corridor there (see `corridorExits`), since thick traces are often split into runs a row or two apart
+EXIT_GAP = 2
+
+
+def downsampled(binary: BinaryImage, factor: int, minimumPixels: int = 1) -> BinaryImage:
+    """Shrinks the image by `factor` in both directions. A pixel is on if at least `minimumPixels` pixels in its block
+    are on, so thin traces survive the downsampling (and, with `minimumPixels > 1`, isolated specks don't).
+    """
+    height, width = binary.data.shape
+    paddedHeight, paddedWidth = -(-height // factor) * factor, -(-width // factor) * factor
+
+    padded = np.zeros((paddedHeight, paddedWidth), dtype=np.float32)
+    padded[:height, :width] = binary.data > 0
+
+    # Area interpolation by a whole factor averages each block exactly
+    coarseSize = (paddedWidth // factor, paddedHeight // factor)
+    means: np.ndarray = cv2.resize(padded, coarseSize, interpolation=cv2.INTER_AREA)
+
+    return BinaryImage((means * (factor * factor) >= minimumPixels - .5).astype(np.uint8))
+
+
+def nearOptimalRuns(runs: viterbi.ColumnRuns, factor: int, scoreMargin: float) -> Optional[np.ndarray]:
+    """The coarse runs on any path through the coarse level that scores within `scoreMargin` of the best one, or None if
+    there are no runs.
+
+    Distances are scaled back up by `factor`, so the coarse paths are scored like full resolution ones. The best score
+    through each run is its score sweeping left-to-right plus its score sweeping right-to-left (over the mirrored
+    image). More than just the best path has to be kept, since the downsampling smooths traces unevenly: the coarse
+    scores can't reliably tell which of two similar traces (e.g. a lead and the edge of its neighbor, or either branch
+    between two crossings) the full resolution search would pick, so the corridor has to hold both.
+    """
+    if len(runs.centers) == 0:
+        return None
+
+    columnOffsets, columns, rows = runs.columnOffsets, runs.columns, runs.centers.astype(float)
+    forwardScores, _ = vectorized.sweep(columnOffsets, columns, rows, scale=factor)
+
+    # The same runs, mirrored: the columns are reversed, but the runs of each column are still ordered top to bottom
+    counts = np.diff(columnOffsets)
+    mirroredOffsets = np.zeros_like(columnOffsets)
+    np.cumsum(counts[::-1], out=mirroredOffsets[1:])
+    mirroredColumns = runs.width - 1 - columns
+    mirrored = mirroredOffsets[mirroredColumns] + (np.arange(len(rows)) - columnOffsets[columns])
+
+    order = np.argsort(mirrored)
+    backwardScores = np.empty_like(forwardScores)
+    backwardScores[order], _ = vectorized.sweep(mirroredOffsets, mirroredColumns[order], rows[order], scale=factor)
+
+    totals = forwardScores + backwardScores
+    nearOptimal: np.ndarray = np.flatnonzero(totals <= totals.min() * (1 + scoreMargin))
+    return nearOptimal
+
+
+def corridorMask(
+    coarseRuns: viterbi.ColumnRuns,
+    pathRuns: np.ndarray,
+    shape: Tuple[int, ...],
+    factor: int,
+    radius: int,
+) -> np.ndarray:
+    """The coarse pixels whose full resolution blocks are searched, as a boolean image of the coarse level's `shape`.
+
+    In each coarse column, that is every row covered by a path run (see `nearOptimalRuns`) in the column or its two
+    neighbors, plus all of any coarse run (on a path or not) touching those rows, so a steep segment (a QRS complex)
+    stays in the corridor entirely even where the coarse paths cut it short. The result is then padded vertically by
+    `radius` full resolution rows. Columns no coarse path passes through are left unbounded.
+    """
+    height, width = shape
+    pathColumns = coarseRuns.columns[pathRuns]
+
+    # Rows of the path runs (as +1/-1 at their starts and ends), spread to the neighboring columns
+    edges = np.zeros((height + 1, width + 2), dtype=int)
+    for shift in (0, 1, 2):
+        np.add.at(edges, (coarseRuns.starts[pathRuns], pathColumns + shift), 1)
+        np.add.at(edges, (coarseRuns.ends[pathRuns], pathColumns + shift), -1)
+    covered = np.cumsum(edges[:, 1:-1], axis=0) > 0
+
+    # Any run touching those rows (its block rows, or the ones just above or below) is added whole
+    coveredCounts = np.zeros((height + 2, width), dtype=int)
+    np.cumsum(covered[:height], axis=0, out=coveredCounts[1:-1])
+    coveredCounts[-1] = coveredCounts[-2]
+    columns = coarseRuns.columns
+    touching = (
+        coveredCounts[np.minimum(coarseRuns.ends + 1, height + 1), columns]
+        > coveredCounts[np.maximum(coarseRuns.starts - 1, 0), columns]
+    )
+    np.add.at(edges, (coarseRuns.starts[touching], columns[touching] + 1), 1)
+    np.add.at(edges, (coarseRuns.ends[touching], columns[touching] + 1), -1)
+    mask: np.ndarray = np.cumsum(edges[:height, 1:-1], axis=0) > 0
+
+    padding = -(-radius // factor)
+    if padding > 0:
+        dilated: np.ndarray = cv2.dilate(mask.astype(np.uint8), np.ones((2 * padding + 1, 1), dtype=np.uint8))
+        mask = dilated > 0
+
+    mask[:, ~mask.any(axis=0)] = True
+    return mask
+
+
+def corridorExits(runs: viterbi.ColumnRuns, pathRuns: np.ndarray, excluded: np.ndarray, gap: int) -> np.ndarray:
+    """The columns of the runs left out of the corridor (where `excluded`) that come within `gap` rows of a run on the
+    path in the same or an adjacent column, i.e. where the trace may continue outside of the corridor.
+    """
+    width = runs.width
+    pathColumns = runs.columns[pathRuns]
+
+    # Rows of the path's run in each column (an empty range where the path has none), padded by a column on each side
+    pathStarts = np.full(width + 2, np.iinfo(int).max)
+    pathEnds = np.full(width + 2, np.iinfo(int).min)
+    pathStarts[pathColumns + 1] = runs.starts[pathRuns]
+    pathEnds[pathColumns + 1] = runs.ends[pathRuns]
+
+    columns = runs.columns[excluded] + 1
+    starts, ends = runs.starts[excluded], runs.ends[excluded]
+
+    # `ends` are exclusive, so with no gap, runs also touch when one ends right where the other starts
+    touching = np.zeros(len(columns), dtype=bool)
+    for shift in (-1, 0, 1):
+        touching |= (starts <= pathEnds[columns + shift] + gap) & (ends + gap >= pathStarts[columns + shift])
+
+    exits: np.ndarray = np.unique(columns[touching] - 1)
+    return exits
+
+
+def extractSignal(
+    binary: BinaryImage,
+    factor: int = DEFAULT_FACTOR,
+    corridorRadius: int = DEFAULT_CORRIDOR_RADIUS,
+    minimumPixels: Optional[int] = None,
+    scoreMargin: float = DEFAULT_SCORE_MARGIN,
+    minimumDensity: float = DEFAULT_MINIMUM_DENSITY,
+    maximumWidenings: int = DEFAULT_MAXIMUM_WIDENINGS,
+    maximumCorridorFraction: float = DEFAULT_MAXIMUM_CORRIDOR_FRACTION,
+    timings: Optional[Dict[str, float]] = None,
+) -> Optional[np.ndarray]:
+    """Extracts the signal from a binary image of a lead, coarse-to-fine.
+
+    The result is meant to be the same as the full search's (`vectorized.extractSignal`). Wherever the full resolution
+    path runs into the edge of the corridor (see `corridorExits`), the corridor is lifted around those columns and
+    searched again, up to `maximumWidenings` times before the full search is run instead. The full search is also run
+    directly if the image is too sparse, or the corridor too wide, for the corridor to save anything. The paths only
+    differ where the full search cuts across points the corridor left out without running into its edge (e.g. through
+    speckle below a QRS complex, rather than along it).
+
+    Args:
+        binary (BinaryImage): Binary image of the lead's trace (e.g. the output of `signal.detection.adaptive`).
+        factor (int, optional): How much the coarse level is downsampled by. Defaults to 4.
+        corridorRadius (int, optional): How far (in full resolution rows) outside the coarse path to search. Defaults to 4.
+        minimumPixels (Optional[int], optional): How many pixels of a block must be on for the coarse pixel to be on
+            (see `downsampled`). Defaults to `factor`, about as many as a thin trace crossing the block has, which keeps
+            speckle noise (and traces split into many thin runs) from filling the coarse level.
+        scoreMargin (float, optional): How much worse (relative to the best) a coarse path may score and still be kept
+            in the corridor (see `nearOptimalRuns`). Defaults to .25.
+        minimumDensity (float, optional): How many runs per column the image needs on average for the coarse level to
+            be used at all. Defaults to 4.
+        maximumWidenings (int, optional): How many times the corridor may be widened before falling back to the full
+            search. Defaults to 4.
+        maximumCorridorFraction (float, optional): Above this fraction of the runs in the corridor, the full search is
+            run instead. Defaults to .6.
+        timings (Optional[Dict[str, float]], optional): If given, the seconds spent on the `"coarse"` and `"fine"`
+            levels are recorded in it.
+
+    Returns:
+        Optional[np.ndarray]: The signal (in full resolution pixel rows), or None if the image has no candidate points.
+    """
+    assert factor >= 1
+
+    start = time.perf_counter()
+    runs = viterbi.findColumnRuns(binary.data)
+    signal = None
+
+    if len(runs.centers) >= minimumDensity * runs.width:
+        # With a blank row below it, so steep segments running into the bottom of a block aren't dropped as touching
+        # the edge of the image (see `viterbi.findColumnRuns`) when at full resolution they stop just short of it
+        downsampledImage = downsampled(binary, factor, factor if minimumPixels is None else minimumPixels)
+        coarse = np.pad(downsampledImage.data, ((0, 1), (0, 0)))
+        coarseRuns = viterbi.findColumnRuns(coarse)
+        pathRuns = nearOptimalRuns(coarseRuns, factor, scoreMargin)
+        coarseFinished = time.perf_counter()
+
+        if pathRuns is not None:
+            mask = corridorMask(coarseRuns, pathRuns, coarse.shape, factor, corridorRadius)
+
+            # Any point of the first column can start the path for free, so the full resolution path may start well
+            # away from the coarse ones and join them a few columns in (like they can end anywhere in the ending window)
+            startingWidth = -(-vectorized.OPTIMAL_ENDING_WIDTH // factor)
+            mask[:, :startingWidth] = True
+            coarseRows, coarseColumns = runs.centers // factor, runs.columns // factor
+
+            for _ in range(maximumWidenings + 1):
+                inCorridor = mask[coarseRows, coarseColumns]
+                if np.count_nonzero(inCorridor) > maximumCorridorFraction * len(inCorridor):
+                    break
+
+                corridorRuns = runs.filtered(inCorridor)
+
+                path = vectorized.extractPath(corridorRuns)
+                if path is None:
+                    break
+
+                exits = corridorExits(runs, np.flatnonzero(inCorridor)[path], ~inCorridor, EXIT_GAP)
+                if len(exits) == 0:
+                    signal = viterbi.convertPathToSignal(corridorRuns.columns[path], corridorRuns.centers[path])
+                    break
+
+                # Searched in full around where the path ran into the edge of the corridor
+                widened = np.unique(exits // factor)[:, np.newaxis] + np.arange(-WIDENING_RADIUS, WIDENING_RADIUS + 1)
+                mask[:, np.clip(widened, 0, mask.shape[1] - 1).ravel()] = True
+    else:
+        coarseFinished = time.perf_counter()
+
+    if signal is None:
+        signal = vectorized.extractSignalFromRuns(runs)
+
+    fineFinished = time.perf_counter()
+
+    if timings is not None:
+        timings["coarse"] = coarseFinished - start
+        timings["fine"] = fineFinished - coarseFinished
+
+    return signal
@@ -0,0 +1,371 @@
+"""
+vectorized.py
+Created October 18, 2026
+
+Array-backed implementation of the Viterbi signal extraction in `viterbi.py`. Candidate points are the run centers
+from `viterbi.findColumnRuns`, stored as flat NumPy arrays (column offsets + rows), the distances/angles between every
+pair of points in adjacent columns are computed in one batched operation, and the DP table and back pointers are kept
+in flat arrays.
+"""
+import math
+from typing import MutableSequence, Optional, Tuple, Union, cast
+
+import numpy as np
+
+from ... import common
+from ...image import BinaryImage
+from . import viterbi
+
+
+DISTANCE_WEIGHT = .5
+OPTIMAL_ENDING_WIDTH = 20
+DEFAULT_BEAM_WIDTH = 10
+
+# Columns with at least this many transitions are swept in one batch (see `sweep`)
+DENSE_COLUMN_TRANSITIONS = 64
+
+
+def searchBand(
+    rows: np.ndarray,
+    columns: np.ndarray,
+    previousColumns: np.ndarray,
+    candidateStarts: np.ndarray,
+    candidateEnds: np.ndarray,
+    maximumJump: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Narrows each point's candidate range to the candidates at most `maximumJump` rows (per column of horizontal
+    distance) above or below the point. If no candidate lies within the band, the nearest candidate above and below
+    are kept so that the point still has a predecessor.
+    """
+    # Rows are sorted within each column, so (column, row) keys are sorted across the whole array
+    stride = rows.max() + 1
+    keys = columns * stride + rows
+    targets = previousColumns * stride + rows
+    band = maximumJump * (columns - previousColumns)
+
+    lower = np.clip(np.searchsorted(keys, targets - band, side='left'), candidateStarts, candidateEnds)
+    upper = np.clip(np.searchsorted(keys, targets + band, side='right'), candidateStarts, candidateEnds)
+
+    empty = lower == upper
+    lower = np.where(empty, np.maximum(lower - 1, candidateStarts), lower)
+    upper = np.where(empty, np.minimum(upper + 1, candidateEnds), upper)
+
+    return lower, upper
+
+
+def transitionPairs(
+    columnOffsets: np.ndarray,
+    columns: np.ndarray,
+    rows: np.ndarray,
+    maximumJump: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Enumerates every (point, candidate) transition, where the candidates of a point are all the points in the
+    nearest non-empty column to its left (the same set `viterbi.getAdjacent` yields with `minimumLookBack=1`),
+    optionally limited to a vertical band around the point (see `searchBand`).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: `(pairOffsets, candidates)`, such that the candidates of point `i` are
+            `candidates[pairOffsets[i]:pairOffsets[i+1]]`.
+    """
+    previousColumns = viterbi.previousNonEmptyColumns(columnOffsets)[columns]
+    hasPrevious = previousColumns >= 0
+
+    candidateStarts = np.where(hasPrevious, columnOffsets[previousColumns], 0)
+    candidateEnds = np.where(hasPrevious, columnOffsets[previousColumns + 1], 0)
+
+    if maximumJump is not None:
+        candidateStarts, candidateEnds = searchBand(
+            rows, columns, previousColumns, candidateStarts, candidateEnds, maximumJump
+        )
+
+    candidateCounts = candidateEnds - candidateStarts
+
+    pairOffsets = np.zeros(len(columns) + 1, dtype=int)
+    np.cumsum(candidateCounts, out=pairOffsets[1:])
+
+    withinPoint = np.arange(pairOffsets[-1]) - np.repeat(pairOffsets[:-1], candidateCounts)
+    candidates = np.repeat(candidateStarts, candidateCounts) + withinPoint
+
+    return pairOffsets, candidates
+
+
+def anglesFromOffsets(deltaX: Union[float, np.ndarray], deltaY: np.ndarray) -> np.ndarray:
+    angles: np.ndarray = np.arcsin(deltaY / np.sqrt((deltaX**2) + (deltaY**2))) / np.pi * 180
+    return angles
+
+
+def transitionCosts(
+    weightedDistances: np.ndarray,
+    currentAngles: np.ndarray,
+    candidateAngles: np.ndarray,
+) -> np.ndarray:
+    """Batched equivalent of `viterbi.score`, from the (weighted) lengths and angles of the transitions, and the angles
+    their candidates were reached at.
+    """
+    angleValues = 1 - (180 - np.abs(currentAngles - candidateAngles)) / 180
+    costs: np.ndarray = weightedDistances + (angleValues * (1 - DISTANCE_WEIGHT))
+    return costs
+
+
+def transitionScores(
+    currentColumn: int,
+    currentRows: np.ndarray,
+    candidateColumn: int,
+    candidateRows: np.ndarray,
+    candidateScores: np.ndarray,
+    candidateAngles: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Batched equivalent of `viterbi.score` (plus the candidate's score) between every (current, candidate) pair.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The total path scores and the transition angles, both shaped
+            `(len(currentRows), len(candidateRows))`.
+    """
+    deltaX = float(currentColumn - candidateColumn)
+    deltaY = currentRows[:, np.newaxis] - candidateRows[np.newaxis, :]
+
+    weightedDistances = np.sqrt((deltaX**2) + (deltaY**2)) * DISTANCE_WEIGHT
+    currentAngles = anglesFromOffsets(deltaX, deltaY)
+
+    scores = transitionCosts(weightedDistances, currentAngles, candidateAngles) + candidateScores
+
+    return scores, currentAngles
+
+
+def sweep(
+    columnOffsets: np.ndarray,
+    columns: np.ndarray,
+    rows: np.ndarray,
+    maximumJump: Optional[float] = None,
+    scale: float = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Fills the DP table over every transition from `transitionPairs`.
+
+    The geometry of every transition is computed in one batch, and so is the choice of every point that has a single
+    candidate (most of them, on a clean trace). The rest of the recurrence is sequential: columns with at least
+    `DENSE_COLUMN_TRANSITIONS` transitions are filled a column at a time (like `transitionScores`), and the columns in
+    between point by point, since most of them only have one or two candidates and NumPy's per-call overhead would
+    cost more than the arithmetic.
+
+    Distances are multiplied by `scale` (e.g. so a path through a downsampled image is scored like one through the
+    original image).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The best score and back pointer (-1 if none) of every candidate point.
+    """
+    pointCount = len(rows)
+    pairOffsets, candidates = transitionPairs(columnOffsets, columns, rows, maximumJump)
+    pairCounts = np.diff(pairOffsets)
+    currents = np.repeat(np.arange(pointCount), pairCounts)
+
+    # Geometry of every transition in one batch (the parts of `viterbi.score` that don't depend on the DP table)
+    deltaX = (columns[currents] - columns[candidates]) * float(scale)
+    deltaY = (rows[currents] - rows[candidates]) * scale
+    weightedDistances = np.sqrt((deltaX**2) + (deltaY**2)) * DISTANCE_WEIGHT
+    transitionAngles = anglesFromOffsets(deltaX, deltaY)
+
+    # DP table: best score, transition angle and back pointer (-1 if none) for every candidate point
+    scores = np.zeros(pointCount, dtype=float)
+    angles = np.zeros(pointCount, dtype=float)
+    backPointers = np.full(pointCount, -1, dtype=int)
+
+    single = np.flatnonzero(pairCounts == 1)
+    backPointers[single] = candidates[pairOffsets[single]]
+    angles[single] = transitionAngles[pairOffsets[single]]
+
+    denseColumns = np.flatnonzero(np.diff(pairOffsets[columnOffsets]) >= DENSE_COLUMN_TRANSITIONS)
+    denseStarts = columnOffsets[denseColumns].tolist()
+    denseEnds = columnOffsets[denseColumns + 1].tolist()
+
+    # Scalar access to the table for the point by point sweep: the items of the arrays' buffers are plain Python
+    # numbers, which are several times faster to index and do arithmetic with than the arrays' items
+    scoreValues = cast(MutableSequence[float], scores.data)
+    angleValues = cast(MutableSequence[float], angles.data)
+    backPointerValues = cast(MutableSequence[int], backPointers.data)
+
+    for sparseStart, sparseEnd, denseEnd in zip([0] + denseEnds, denseStarts + [pointCount], denseEnds + [pointCount]):
+        if sparseEnd > sparseStart:
+            firstPair = int(pairOffsets[sparseStart])
+            pairs = slice(firstPair, int(pairOffsets[sparseEnd]))
+            pairStarts = (pairOffsets[sparseStart:sparseEnd + 1] - firstPair).tolist()
+            pairCandidates = candidates[pairs].tolist()
+            pairDistances = weightedDistances[pairs].tolist()
+            pairAngles = transitionAngles[pairs].tolist()
+
+            for point, pairStart, pairEnd in zip(range(sparseStart, sparseEnd), pairStarts, pairStarts[1:]):
+                if pairEnd - pairStart == 1:
+                    # The back pointer and angle are already filled in
+                    candidate = pairCandidates[pairStart]
+                    angleValue = 1 - (180 - abs(pairAngles[pairStart] - angleValues[candidate])) / 180
+                    scoreValues[point] = (
+                        (pairDistances[pairStart] + (angleValue * (1 - DISTANCE_WEIGHT))) + scoreValues[candidate]
+                    )
+                elif pairEnd > pairStart:
+                    bestScore, bestPair = math.inf, pairStart
+
+                    for pair in range(pairStart, pairEnd):
+                        candidate = pairCandidates[pair]
+                        angleValue = 1 - (180 - abs(pairAngles[pair] - angleValues[candidate])) / 180
+                        totalScore = (
+                            (pairDistances[pair] + (angleValue * (1 - DISTANCE_WEIGHT))) + scoreValues[candidate]
+                        )
+
+                        # Strict comparison keeps the first minimum, matching the tie-breaking of `min` in
+                        # `viterbi.extractSignal`
+                        if totalScore < bestScore:
+                            bestScore, bestPair = totalScore, pair
+
+                    scoreValues[point] = bestScore
+                    angleValues[point] = pairAngles[bestPair]
+                    backPointerValues[point] = pairCandidates[bestPair]
+
+        if denseEnd > sparseEnd:
+            start, end = sparseEnd, denseEnd
+            pairs = slice(int(pairOffsets[start]), int(pairOffsets[end]))
+            columnCandidates = candidates[pairs]
+
+            totals = transitionCosts(
+                weightedDistances[pairs], transitionAngles[pairs], angles[columnCandidates]
+            ) + scores[columnCandidates]
+
+            # The first minimum of each point's transitions (each point has at least one, as the column isn't the first)
+            pointStarts = pairOffsets[start:end] - pairs.start
+            best = np.minimum.reduceat(totals, pointStarts)
+            minima = np.flatnonzero(totals == np.repeat(best, pairCounts[start:end]))
+            bestPairs = pairs.start + minima[np.searchsorted(minima, pointStarts)]
+
+            scores[start:end] = best
+            angles[start:end] = transitionAngles[bestPairs]
+            backPointers[start:end] = candidates[bestPairs]
+
+    return scores, backPointers
+
+
+def beamSweep(columnOffsets: np.ndarray, rows: np.ndarray, beamWidth: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Fills the DP table like `sweep`, but only the `beamWidth` best scoring points of each column (after the first)
+    are extended into the next one, so each column costs at most `O(pointsInColumn * beamWidth)` regardless of how dense
+    the image is.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The best score and back pointer (-1 if none) of every candidate point.
+    """
+    assert beamWidth >= 1
+
+    scores = np.zeros(len(rows), dtype=float)
+    angles = np.zeros(len(rows), dtype=float)
+    backPointers = np.full(len(rows), -1, dtype=int)
+
+    beam: Optional[np.ndarray] = None  # Surviving points of the nearest non-empty column to the left
+    beamColumn = -1
+
+    for column in range(len(columnOffsets) - 1):
+        start, end = columnOffsets[column], columnOffsets[column + 1]
+        if start == end:
+            continue
+
+        if beam is None:
+            # Every point of the first column starts with a score of 0, so there is nothing to rank them by yet; they
+            # are all extended, and the beam only starts pruning from the next column on
+            beam = np.arange(start, end)
+        else:
+            totals, transitionAngles = transitionScores(
+                column, rows[start:end], beamColumn, rows[beam], scores[beam], angles[beam]
+            )
+
+            # `argmin` keeps the first minimum, matching the tie-breaking of `min` in `viterbi.extractSignal`
+            best = np.argmin(totals, axis=1)
+            current = np.arange(end - start)
+            scores[start:end] = totals[current, best]
+            angles[start:end] = transitionAngles[current, best]
+            backPointers[start:end] = beam[best]
+
+            # Kept in row order so ties are still broken the same way as without a beam
+            beam = start + np.sort(np.argsort(scores[start:end], kind='stable')[:beamWidth])
+
+        beamColumn = column
+
+    return scores, backPointers
+
+
+def backtrack(backPointers: np.ndarray, endIndex: int) -> np.ndarray:
+    """Follows the back pointers from `endIndex` to the start of the path (returned right-to-left)."""
+    pointers = backPointers.tolist()
+    path = []
+    current = endIndex
+
+    while current >= 0:
+        path.append(current)
+        current = pointers[current]
+
+    return np.array(path, dtype=int)
+
+
+def extractSignal(
+    binary: BinaryImage,
+    maximumJump: Optional[float] = None,
+    beamWidth: Optional[int] = None,
+) -> Optional[np.ndarray]:
+    """Extracts the signal from a binary image of a lead.
+
+    Args:
+        binary (BinaryImage): Binary image of the lead's trace.
+        maximumJump (Optional[float], optional): If given, transitions are only scored between points at most this many
+            rows apart per column of horizontal distance, which bounds the cost on noisy crops. QRS complexes can move
+            well over a hundred rows between adjacent columns, so this should be set above the steepest slope expected
+            in the trace. Defaults to None (every candidate in the previous column is scored).
+        beamWidth (Optional[int], optional): If given, only this many of the best partial paths in each column are
+            extended (see `beamSweep`). Cannot be combined with `maximumJump`. Defaults to None (no beam).
+
+    Returns:
+        Optional[np.ndarray]: The signal (in pixel rows), or None if the image has no candidate points.
+    """
+    return extractSignalFromRuns(viterbi.findColumnRuns(binary.data), maximumJump, beamWidth)
+
+
+def extractSignalFromRuns(
+    runs: viterbi.ColumnRuns,
+    maximumJump: Optional[float] = None,
+    beamWidth: Optional[int] = None,
+) -> Optional[np.ndarray]:
+    """Same as `extractSignal`, but searches over already detected runs (see `viterbi.findColumnRuns`)."""
+    path = extractPath(runs, maximumJump, beamWidth)
+
+    if path is None:
+        return None
+
+    return viterbi.convertPathToSignal(runs.columns[path], runs.centers[path])
+
+
+def extractPath(
+    runs: viterbi.ColumnRuns,
+    maximumJump: Optional[float] = None,
+    beamWidth: Optional[int] = None,
+) -> Optional[np.ndarray]:
+    """Finds the best path through the runs.
+
+    Returns:
+        Optional[np.ndarray]: The indices of the runs on the path (right-to-left), or None if there are no runs.
+    """
+    if maximumJump is not None and beamWidth is not None:
+        raise ValueError("`maximumJump` and `beamWidth` cannot be used together")
+
+    columnOffsets, rows = runs.columnOffsets, runs.centers.astype(float)
+
+    if len(rows) == 0:
+        return None
+
+    width = runs.width
+    columns = runs.columns
+
+    if beamWidth is None:
+        scores, backPointers = sweep(columnOffsets, columns, rows, maximumJump)
+    else:
+        scores, backPointers = beamSweep(columnOffsets, rows, beamWidth)
+
+    # The path ends at the best scoring point within the last few columns (or the last column with any points)
+    endingColumn = min(int(common.lowerClamp(width - OPTIMAL_ENDING_WIDTH, 0)), int(columns[-1]))
+
+    endingStart = int(columnOffsets[endingColumn])
+    endIndex = endingStart + int(np.argmin(scores[endingStart:]))
+
+    return backtrack(backPointers, endIndex)
@@ -5,8 +5,9 @@ Created November 7, 2020
 -
 """
 from pathlib import Path
+from typing import Optional
 
-from PyQt5 import QtCore, QtWidgets
+from PyQt5 import QtCore, QtGui, QtWidgets
 
 from model.Lead import LeadId
 from views.ImageView import *
@@ -148,12 +149,12 @@ class Editor(QtWidgets.QWidget):
         self.EditPanelGlobalView.setLastSavedTimeStamp(timeStamp=None)
         self.showGlobalView()
 
-    def loadImageFromPath(self, path: Path):
+    def loadImageFromPath(self, path: Path, preparedImage: Optional[ImageUtilities.ImagePyramid] = None):
         self.image = ImageUtilities.readImage(path)
-        self.displayImage()
+        self.displayImage(preparedImage)
 
-    def displayImage(self):
-        self.imageViewer.setImage(self.image)
+    def displayImage(self, preparedImage: Optional[ImageUtilities.ImagePyramid] = None):
+        self.imageViewer.setImage(self.image, preparedImage)
         self.editPanel.show()
 
         # Adjust zoom to fit image in view
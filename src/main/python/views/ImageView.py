@@ -4,13 +4,17 @@ Created November 1, 2020
 
 ...
 """
+import math
 import sys
-from typing import Any
+from typing import Any, Dict, Optional
+
+import numpy as np
 
 from PyQt5 import QtGui, QtCore, QtWidgets
 
 import ImageUtilities
 from views.ROIView import ROI_ITEM_TYPE
+from views.TiledImageItem import TiledImageItem
 from model.Lead import Lead, LeadId
 
 
@@ -20,6 +24,9 @@ MACOS_SCROLL_KEYS = {QtCore.Qt.Key_Meta}  # Option key
 # lost focus. (ARGH!!!)
 SCROLL_STEP_FACTOR= 1.5
 
+LEAD_TRACE_COLOR = QtGui.QColor(248, 19, 85)  # Same as the previews (`visualization.overlaySignalOnImage`)
+LEAD_TRACE_WIDTH = 2  # In screen pixels
+
 
 onMacOS = sys.platform == "darwin"
 
@@ -41,8 +48,9 @@ class ImageView(QtWidgets.QGraphicsView):
 
         self._scene = QtWidgets.QGraphicsScene(self)
         self._container = ImageView.createContainer()  # Permits rotation mechanics
-        self._pixmapItem = QtWidgets.QGraphicsPixmapItem(parent=self._container)  # The pixmap form of the image data
+        self._imageItem = TiledImageItem(parent=self._container)  # Draws only the visible tiles of the image data
         self._scene.addItem(self._container)
+        self._leadTraces: Dict[str, QtWidgets.QGraphicsPathItem] = {}  # Live previews, by lead name
 
         self.setMinimumSize(600, 400) # What does this do?
         self.setScene(self._scene)
@@ -83,7 +91,7 @@ class ImageView(QtWidgets.QGraphicsView):
 
     @property
     def imageRect(self):
-        return QtCore.QRectF(self._pixmapItem.pixmap().rect())
+        return self._imageItem.boundingRect()
 
     def imageChanged(self):
         print("Image changed")
@@ -100,9 +108,10 @@ class ImageView(QtWidgets.QGraphicsView):
     def hasImage(self):
         return not self._empty
 
-    def setImage(self, image=None):
+    def setImage(self, image=None, preparedImage: Optional[ImageUtilities.ImagePyramid] = None):
+        """Shows `image`, using `preparedImage` if given (its pyramid, already built, e.g. by `ImagePrefetcher`)."""
         print("Image set")
-        self._pixmapItem.setPixmap(ImageUtilities.opencvImageToPixmap(image))
+        self._imageItem.setImage(image, preparedImage)
         self._empty = False
         self.setDragMode(QtWidgets.QGraphicsView.NoDrag)
 
@@ -112,8 +121,8 @@ class ImageView(QtWidgets.QGraphicsView):
         self.rotateImage(0)
 
         # Set rotation origin in the center of the image
-        pixmapSize = self._pixmapItem.pixmap().size()
-        self._pixmapItem.setTransformOriginPoint(pixmapSize.width() // 2, pixmapSize.height() // 2)
+        imageSize = self._imageItem.size()
+        self._imageItem.setTransformOriginPoint(imageSize.width() // 2, imageSize.height() // 2)
 
         self.imageChanged()
 
@@ -122,7 +131,7 @@ class ImageView(QtWidgets.QGraphicsView):
 
     def removeImage(self):
         self._image = None
-        self._pixmapItem.setPixmap(QtGui.QPixmap())
+        self._imageItem.setImage(None)
         self._empty = True
 
         # Hide the image background container
@@ -135,12 +144,46 @@ class ImageView(QtWidgets.QGraphicsView):
         for item in self._scene.items():
             if item.type == ROI_ITEM_TYPE:
                 self._scene.removeItem(item)
+        self.removeAllLeadTraces()
 
     def removeRoiBox(self, leadId):
         # remove indiviudual roi from scene
         for item in self._scene.items():
             if item.type == ROI_ITEM_TYPE and item.leadId == leadId:
                 self._scene.removeItem(item)
+        self.removeLeadTrace(leadId)
+
+    def setLeadTrace(self, leadId: str, x: int, y: int, signal: np.ndarray):
+        """Draws the extracted signal (rows within the lead's region, NaN where missing) over the region at (x, y)."""
+        self.removeLeadTrace(leadId)
+
+        path = QtGui.QPainterPath()
+        penDown = False
+        for column, row in enumerate(signal):
+            if math.isnan(row):
+                penDown = False
+            elif penDown:
+                path.lineTo(x + column, y + row)
+            else:
+                path.moveTo(x + column, y + row)
+                penDown = True
+
+        pen = QtGui.QPen(LEAD_TRACE_COLOR, LEAD_TRACE_WIDTH)
+        pen.setCosmetic(True)  # Same width at every zoom level
+
+        trace = self._scene.addPath(path, pen)
+        trace.setZValue(0.5)  # Above unselected ROI boxes, below the selected one
+        trace.setAcceptedMouseButtons(QtCore.Qt.NoButton)  # Clicks go through to the ROI box underneath
+        self._leadTraces[leadId] = trace
+
+    def removeLeadTrace(self, leadId: str):
+        trace = self._leadTraces.pop(leadId, None)
+        if trace is not None:
+            self._scene.removeItem(trace)
+
+    def removeAllLeadTraces(self):
+        for leadId in list(self._leadTraces):
+            self.removeLeadTrace(leadId)
 
     def getAllLeadRoisAsDict(self):
         # return all lead ROIs present in the scene as a dictionary with LeadId:Lead pairs
@@ -212,7 +255,7 @@ class ImageView(QtWidgets.QGraphicsView):
             self._scale = new_scale
             self.scale(scaleChange, scaleChange)
         else:  # Snap image to the window so it's never smaller than the canvas
-            self.fitInView(QtCore.QRectF(self._pixmapItem.pixmap().rect()), QtCore.Qt.KeepAspectRatio)
+            self.fitInView(self.imageRect, QtCore.Qt.KeepAspectRatio)
             self._scale = 1
 
     #zoomIn and zoomOut based on: https://stackoverflow.com/questions/57713795/zoom-in-and-out-in-widget
@@ -247,4 +290,4 @@ class ImageView(QtWidgets.QGraphicsView):
 
     def rotateImage(self, rotation: float):
         # The QGraphics notion of rotation is opposite standard angle meaning
-        self._pixmapItem.setRotation(rotation * -1)
\ No newline at end of file
+        self._imageItem.setRotation(rotation * -1)
\ No newline at end of file
@@ -26,6 +26,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def buildUI(self):
         self.buildMenuBar()
         self.buildLeadButtonDictionary()
+        self.livePreview.setCheckable(True)
 
         self.editor = Editor(self)
         self.setCentralWidget(self.editor)
@@ -166,6 +167,14 @@ class MainWindow(QtWidgets.QMainWindow):
                     displayName="Add Lead V6",
                     shortcut=QtGui.QKeySequence('Ctrl+]'),
                     statusTip="Add Lead V6"
+                ),
+                Qt.Separator(),
+                Qt.MenuAction(
+                    owner=self,
+                    name="livePreview",
+                    displayName="Live Preview",
+                    shortcut=QtGui.QKeySequence('Ctrl+L'),
+                    statusTip="Show the extracted signal of each lead while adjusting the lead boxes"
                 )
             ]
         )
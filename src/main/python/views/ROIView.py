@@ -135,6 +135,9 @@ class ROIItem(QtWidgets.QGraphicsRectItem):
             self.updateHandlesPos()
             super().mouseMoveEvent(mouseEvent)
 
+        # Lets the live preview follow the box while it's dragged (it waits until the box stops moving)
+        self.parentViews[0].updateRoiItem.emit(self)
+
     def mouseReleaseEvent(self, mouseEvent):
         """
         Executed when the mouse is released from the item.
@@ -0,0 +1,108 @@
+"""
+TiledImageItem.py
+Created October 18, 2026
+
+Graphics item that draws a (large) OpenCV image from an `ImagePyramid`, tile by tile, so only the tiles in view are
+ever converted for display, at the resolution the view is zoomed to.
+"""
+from collections import OrderedDict
+import math
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from ImageUtilities import ImagePyramid
+
+
+TILE_SIZE = 512  # In pixels of the tile's level
+TILE_CACHE_BYTES = 128 * 2**20
+
+# (level, column, row)
+TileKey = Tuple[int, int, int]
+
+
+class TiledImageItem(QtWidgets.QGraphicsItem):
+    """Draws the image at full resolution size in item coordinates (like a `QGraphicsPixmapItem` would), choosing the
+    smallest pyramid level that still has at least one pixel per screen pixel, and converting only the tiles that
+    intersect the exposed area. Converted tiles are kept (least recently used first out) up to `TILE_CACHE_BYTES`.
+    """
+
+    def __init__(self, parent: Optional[QtWidgets.QGraphicsItem] = None):
+        super().__init__(parent)
+        self._pyramid: Optional[ImagePyramid] = None
+        self._tiles: "OrderedDict[TileKey, QtGui.QPixmap]" = OrderedDict()
+        self._tileBytes = 0
+
+        # Needed for `option.exposedRect`
+        self.setFlag(QtWidgets.QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def setImage(self, image: Optional[np.ndarray], pyramid: Optional[ImagePyramid] = None) -> None:
+        """Shows `image` (BGR), or clears the item if None. `pyramid` can be given if one was already built for it."""
+        self.prepareGeometryChange()
+        self._pyramid = pyramid if pyramid is not None else (ImagePyramid(image, TILE_SIZE) if image is not None else None)
+        self._tiles.clear()
+        self._tileBytes = 0
+        self.update()
+
+    def size(self) -> QtCore.QSize:
+        if self._pyramid is None:
+            return QtCore.QSize()
+        return QtCore.QSize(self._pyramid.width, self._pyramid.height)
+
+    def boundingRect(self) -> QtCore.QRectF:
+        return QtCore.QRectF(QtCore.QPointF(0, 0), QtCore.QSizeF(self.size()))
+
+    def paint(self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionGraphicsItem, widget=None) -> None:
+        if self._pyramid is None:
+            return
+
+        levelOfDetail = option.levelOfDetailFromTransform(painter.worldTransform())
+        level = max(0, math.floor(math.log2(1 / levelOfDetail))) if levelOfDetail > 0 else 0
+        level = min(level, self._pyramid.levelCount - 1)
+        scale = 2 ** level
+
+        levelImage = self._pyramid.level(level)
+        levelHeight, levelWidth = levelImage.shape[:2]
+
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        firstColumn = max(0, int(exposed.left() / scale) // TILE_SIZE)
+        lastColumn = min((levelWidth - 1) // TILE_SIZE, int(exposed.right() / scale) // TILE_SIZE)
+        firstRow = max(0, int(exposed.top() / scale) // TILE_SIZE)
+        lastRow = min((levelHeight - 1) // TILE_SIZE, int(exposed.bottom() / scale) // TILE_SIZE)
+
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, levelOfDetail < 1)
+
+        for row in range(firstRow, lastRow + 1):
+            for column in range(firstColumn, lastColumn + 1):
+                tile = self._tile(level, column, row, levelImage)
+                target = QtCore.QRectF(
+                    column * TILE_SIZE * scale, row * TILE_SIZE * scale, tile.width() * scale, tile.height() * scale
+                )
+                # The last tiles of a level can reach up to a full resolution pixel past the image, so they are clipped
+                visible = target.intersected(self.boundingRect())
+                source = QtCore.QRectF(0, 0, visible.width() / scale, visible.height() / scale)
+                painter.drawPixmap(visible, tile, source)
+
+    def _tile(self, level: int, column: int, row: int, levelImage: np.ndarray) -> QtGui.QPixmap:
+        key = (level, column, row)
+
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+
+        data = levelImage[row * TILE_SIZE:(row + 1) * TILE_SIZE, column * TILE_SIZE:(column + 1) * TILE_SIZE]
+        rgb = cv2.cvtColor(data, cv2.COLOR_BGR2RGB)
+        height, width = rgb.shape[:2]
+        # `fromImage` copies the pixels, so `rgb` only needs to live until then
+        tile = QtGui.QPixmap.fromImage(QtGui.QImage(rgb.data, width, height, 3 * width, QtGui.QImage.Format_RGB888))
+
+        self._tiles[key] = tile
+        self._tileBytes += rgb.nbytes
+        while self._tileBytes > TILE_CACHE_BYTES and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self._tileBytes -= evicted.width() * evicted.height() * 3
+
+        return tile
+
@@ -0,0 +1,10 @@
+"""
+conftest.py
+Created October 18, 2026
+
+Makes the application's modules (in `src/main/python`) importable from the tests, like the scripts in `scripts/` do.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / 'src' / 'main' / 'python'))
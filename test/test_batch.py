@@ -0,0 +1,43 @@
+"""
+test_batch.py
+Created October 18, 2026
+
+Checks how the batch sorts its inputs against the manifest, including files it can't read.
+"""
+from ecgdigitize import batch, manifest
+
+
+def test_unreadableFilesFailOnTheirOwn(tmp_path):
+    readable = tmp_path / 'readable.png'
+    readable.write_bytes(b'not really a png')
+    vanished = tmp_path / 'vanished.png'  # E.g. deleted after the folder was listed
+    unreadable = tmp_path / 'directory.png'
+    unreadable.mkdir()
+
+    batchManifest = manifest.BatchManifest(tmp_path / manifest.MANIFEST_FILENAME)
+    contentHashes, upToDate, failures = batch.hashFiles([vanished, readable, unreadable], batchManifest, 'settings')
+
+    assert list(contentHashes) == [readable]
+    assert upToDate == []
+    assert [result.path for result in failures] == [vanished, unreadable]
+    assert all(result.error is not None for result in failures)
+
+    # Recorded as failed, so they are retried next time
+    reloaded = manifest.BatchManifest(tmp_path / manifest.MANIFEST_FILENAME)
+    for path in [vanished, unreadable]:
+        assert reloaded.records[str(path.absolute())].status is manifest.Status.failed
+        assert not reloaded.isUpToDate(path, '', 'settings')
+
+
+def test_upToDateFilesAreSkippedUnlessForced(tmp_path):
+    path = tmp_path / 'scan.png'
+    path.write_bytes(b'not really a png')
+    output = tmp_path / 'scan.csv'
+    output.write_text('')
+
+    batchManifest = manifest.BatchManifest(tmp_path / manifest.MANIFEST_FILENAME)
+    batchManifest.record(path, manifest.fileDigest(path), 'settings', manifest.Status.done, [output])
+
+    assert batch.hashFiles([path], batchManifest, 'settings') == ({}, [path], [])
+    assert list(batch.hashFiles([path], batchManifest, 'settings', force=True)[0]) == [path]
+    assert list(batch.hashFiles([path], batchManifest, 'other settings')[0]) == [path]
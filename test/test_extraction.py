@@ -0,0 +1,102 @@
+"""
+test_extraction.py
+Created October 18, 2026
+
+Checks the faster signal extraction modes against the full search of `vectorized.extractSignal`.
+"""
+import json
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pytest
+
+from ecgdigitize.image import BinaryImage, Rectangle, cropped, openImage
+from ecgdigitize.signal import detection
+from ecgdigitize.signal.extraction import pyramid, vectorized
+
+
+TEST_FOLDER = Path(__file__).parent.parent / '.paperecg' / 'TestFolder'
+
+
+def denseMask(seed: int, width: int = 1000, height: int = 300, traces: int = 3, thickness: int = 9) -> BinaryImage:
+    """Thick, overlapping traces, with every other row cleared so each one is split into several runs per column, plus
+    speckle noise.
+    """
+    random = np.random.default_rng(seed)
+    data = np.zeros((height, width), dtype=np.uint8)
+    columns = np.arange(width)
+
+    for trace in range(traces):
+        center = height * (trace + 1) / (traces + 1)
+        rows = center + 60 * np.sin(columns / random.uniform(20, 40) + random.uniform(0, 2 * np.pi))
+        rows = np.clip(rows, thickness, height - thickness - 1).astype(int)
+        for column in columns:
+            data[rows[column] - thickness // 2:rows[column] + thickness // 2 + 1, column] = 1
+
+    data[::2, :] = 0
+    data |= (random.random((height, width)) < 0.02).astype(np.uint8)
+
+    return BinaryImage(data)
+
+
+def scanLead(scan: str, lead: str) -> BinaryImage:
+    """The binary image of a lead of one of the test scans, cropped where its annotation puts it."""
+    with open(TEST_FOLDER / '.paperecg' / f'{scan}-png.json') as file:
+        cropping = json.load(file)['leads'][lead]['cropping']
+
+    image = openImage(TEST_FOLDER / f'{scan}.png')
+    region = Rectangle(cropping['x'], cropping['y'], cropping['width'], cropping['height'])
+
+    return detection.adaptive(cropped(image, region))
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_beamFollowsFullSearchOnDenseMasks(seed):
+    binary = denseMask(seed)
+
+    full = vectorized.extractSignal(binary)
+    beam = vectorized.extractSignal(binary, beamWidth=vectorized.DEFAULT_BEAM_WIDTH)
+
+    assert full is not None and beam is not None
+    length = min(len(full), len(beam))
+    # The beam can lose track briefly where traces cross, but not follow another trace
+    assert np.mean(np.abs(full[:length] - beam[:length]) <= 2) >= 0.9
+
+
+def forbidFullSearch(monkeypatch):
+    """Makes `pyramid.extractSignal` fail if it falls back to the full search instead of using the corridor."""
+    def fullSearch(*args, **kwargs):
+        raise AssertionError("Fell back to the full search")
+
+    monkeypatch.setattr(vectorized, 'extractSignalFromRuns', fullSearch)
+
+
+# Leads whose QRS complexes are steeper than the coarse paths (the first three; the corridor used to cut their peaks
+# off), and one whose crop also holds the edge of its neighbor, which the coarse level scores as the better trace
+@pytest.mark.parametrize('scan, lead', [('U1_1', 'V1'), ('U2_1', 'V1'), ('U2_1', 'V3'), ('U2_1', 'V5')])
+def test_pyramidFollowsFullSearchOnScans(scan, lead, monkeypatch):
+    binary = scanLead(scan, lead)
+    full = vectorized.extractSignal(binary)
+
+    # The scans are too sparse (and their corridors too wide) for the corridor to be used by default, and their traces
+    # too thin for the default coarse threshold, which is meant for noisy images
+    forbidFullSearch(monkeypatch)
+    coarseToFine = pyramid.extractSignal(binary, minimumPixels=2, minimumDensity=0, maximumCorridorFraction=1)
+
+    assert full is not None and coarseToFine is not None
+    np.testing.assert_array_equal(coarseToFine, full)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_pyramidOnlySearchesTheCorridorOnNoisyMasks(seed, monkeypatch):
+    binary = denseMask(seed, traces=1)
+    full = vectorized.extractSignal(binary)
+
+    forbidFullSearch(monkeypatch)
+    timings: Dict[str, float] = {}
+    coarseToFine = pyramid.extractSignal(binary, timings=timings)
+
+    assert full is not None and coarseToFine is not None
+    np.testing.assert_array_equal(coarseToFine, full)
+    assert set(timings) == {"coarse", "fine"}
@@ -0,0 +1,100 @@
+"""
+test_image.py
+Created October 18, 2026
+
+Checks the region-only image operations against their whole-page equivalents, and how image files are opened.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import ImageUtilities
+from ecgdigitize.image import Rectangle, cropped, openImage, openImagePages, rotated, rotatedAndCropped
+
+
+TEST_FOLDER = Path(__file__).parent.parent / '.paperecg' / 'TestFolder'
+
+
+def assertNearlyEqual(actual: np.ndarray, expected: np.ndarray) -> None:
+    # warpAffine rounds its coordinates to 1/32 of a pixel relative to the image it is given, so warping a patch can
+    # land on a neighbouring step along sharp edges: a few levels off, on well under 1% of the pixels
+    assert actual.shape == expected.shape
+    if actual.size == 0:
+        return
+    difference = np.abs(actual.astype(int) - expected.astype(int))
+    assert difference.max() <= 16
+    assert np.mean(difference > 0) < 0.01
+
+
+@pytest.mark.parametrize('angle', [2, -2, 0.5, 13.7, -45, 90, 180])
+def test_rotatedAndCroppedMatchesRotatingThePage(angle):
+    image = openImage(TEST_FOLDER / 'U2_1.png')
+    with open(TEST_FOLDER / '.paperecg' / 'U2_1-png.json') as file:
+        croppings = [lead['cropping'] for lead in json.load(file)['leads'].values()]
+
+    # The leads, plus regions reaching past the edges of the page and an empty one
+    regions = [Rectangle(cropping['x'], cropping['y'], cropping['width'], cropping['height']) for cropping in croppings]
+    regions += [
+        Rectangle(-20, -30, 200, 100),
+        Rectangle(image.width - 50, image.height - 40, 100, 80),
+        Rectangle(5, 5, 0, 9),
+    ]
+
+    rotatedPage = rotated(image, angle)
+    rotatedGrayscalePage = rotated(image.toGrayscale(), angle)
+
+    for region in regions:
+        assertNearlyEqual(rotatedAndCropped(image, angle, region).data, cropped(rotatedPage, region).data)
+        assertNearlyEqual(
+            rotatedAndCropped(image.toGrayscale(), angle, region).data, cropped(rotatedGrayscalePage, region).data
+        )
+
+
+@pytest.mark.parametrize('suffix', ['.pdf', '.PDF', '.Pdf'])
+def test_pdfsAreRecognizedWhateverTheSuffixCase(suffix, tmp_path, monkeypatch):
+    page = np.full((20, 30, 3), 255, dtype=np.uint8)
+
+    # Only which path the file takes is checked, so the PDF isn't actually rasterized (which needs Poppler)
+    monkeypatch.setattr(ImageUtilities, 'pdfPageCount', lambda path: 2)
+    monkeypatch.setattr(
+        ImageUtilities, 'rasterizePdf', lambda path, firstPage, lastPage, dpi, threadCount=1: [page.copy()]
+    )
+
+    path = tmp_path / f'scan{suffix}'
+    path.write_bytes(b'%PDF-1.4')
+
+    assert [documentPage.number for documentPage in openImagePages(path)] == [1, 2]
+    np.testing.assert_array_equal(ImageUtilities.readImage(path), page)
+
+
+@pytest.mark.parametrize('pdfThreads', [1, 2, 3, 8])
+def test_pdfPagesAreRasterizedInChunksOfThreads(pdfThreads, tmp_path, monkeypatch):
+    requests = []
+
+    def rasterizePdf(path, firstPage, lastPage, dpi, threadCount):
+        requests.append((firstPage, lastPage, threadCount))
+        return [np.full((20, 30, 3), number, dtype=np.uint8) for number in range(firstPage, lastPage + 1)]
+
+    monkeypatch.setattr(ImageUtilities, 'pdfPageCount', lambda path: 5)
+    monkeypatch.setattr(ImageUtilities, 'rasterizePdf', rasterizePdf)
+
+    path = tmp_path / 'scan.pdf'
+    path.write_bytes(b'%PDF-1.4')
+
+    pages = list(openImagePages(path, pdfThreads=pdfThreads))
+    assert [page.number for page in pages] == [1, 2, 3, 4, 5]
+    assert [page.image.data[0, 0, 0] for page in pages] == [1, 2, 3, 4, 5]
+    assert all(lastPage - firstPage + 1 <= pdfThreads for firstPage, lastPage, _ in requests)
+    assert all(threadCount == pdfThreads for _, _, threadCount in requests)
+
+
+def test_cachedImagesAreReadOnly():
+    image = openImage(TEST_FOLDER / 'U2_1.png')
+
+    assert openImage(TEST_FOLDER / 'U2_1.png').data is image.data
+    with pytest.raises(ValueError):
+        image.data[0, 0] = 0
+    with pytest.raises(ValueError):
+        cropped(image, Rectangle(0, 0, 10, 10)).data[:] = 0